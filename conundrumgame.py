@@ -1,17 +1,81 @@
-"""Class for the conundrum game"""
+"""Class for the conundrum game
+
+Conundrum words come from resources/conundrum_word_list.txt: nine-letter
+words that are the only dictionary word made from their letters, so a
+scramble always has exactly one answer. Build the list with:
+
+    python conundrumgame.py build
+"""
 
 # import random
+import os
+import sys
 
 import numpy as np
-import nltk
-# from nltk.corpus import words
 
+import instrumentation
 from utils import scramble_word
 from lettersgame import LettersGame
+from wordindex import letter_signature
+from wordstore import get_word_store
+
+CONUNDRUM_WORD_LIST_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources",
+    "conundrum_word_list.txt")
+
+# Conundrum indexes (signature -> word) already loaded, keyed by n_letters,
+# and their words as sorted lists.
+_CONUNDRUM_INDEXES = {}
+_CONUNDRUM_WORDS = {}
+
+
+def build_conundrum_index(words):
+    """Map each sorted-letter signature with exactly one word to that word."""
+    groups = {}
+    for word in set(word.upper() for word in words):
+        groups.setdefault(letter_signature(word), []).append(word)
+    return {signature: group[0] for signature, group in groups.items()
+            if len(group) == 1}
+
+
+def build_conundrum_word_list(n_letters=9, path=CONUNDRUM_WORD_LIST_PATH):
+    """Save every n_letters word with no other anagram, one per line."""
+    index = build_conundrum_index(get_word_store().by_length(n_letters))
+    words = sorted(index.values())
+    with open(path, "w") as f:
+        f.write("\n".join(words) + "\n")
+    return words
+
+
+def load_conundrum_index(n_letters=9, path=CONUNDRUM_WORD_LIST_PATH):
+    """Return the signature -> word index of unique-anagram conundrum words.
+
+    Read from the saved word list when it holds n_letters words; otherwise
+    built from the word store (without saving). Cached per process.
+    """
+    if n_letters not in _CONUNDRUM_INDEXES:
+        words = []
+        if os.path.exists(path):
+            with open(path) as f:
+                words = [line.strip().upper() for line in f if line.strip()]
+        if words and all(len(word) == n_letters for word in words):
+            index = {letter_signature(word): word for word in words}
+        else:
+            index = build_conundrum_index(get_word_store().by_length(n_letters))
+        _CONUNDRUM_INDEXES[n_letters] = index
+        _CONUNDRUM_WORDS[n_letters] = sorted(index.values())
+    return _CONUNDRUM_INDEXES[n_letters]
+
+
+def load_conundrum_words(n_letters=9, path=CONUNDRUM_WORD_LIST_PATH):
+    """Return the sorted conundrum words, cached with their index."""
+    load_conundrum_index(n_letters, path)
+    return _CONUNDRUM_WORDS[n_letters]
+
 
 class ConundrumGame:
     def __init__(self, word_list=None, original_word=None, timer=45,
-                    n_letters=9):
+                    n_letters=9, rng=None):
         """Conundrum game class for the Countdown game.
 
         Rules: an n-level word is scrambled and the player has to guess
@@ -22,36 +86,69 @@ class ConundrumGame:
             original_word (str): Original word to guess.
             timer (int): Time limit in seconds.
             n_letters (int): Number of letters in the word.
+            rng (np.random.Generator): Picks the word; seed it for a
+                reproducible game.
 
         """
-        self.rng = np.random.default_rng()
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.n_letters = n_letters
-        # This needs to be long list of 9-letter words
-        self.word_list = word_list if (word_list is not None
-                        ) else self.generate_wordlist()
+        with instrumentation.timer("conundrum.load_words"):
+            # This needs to be long list of 9-letter words. Words sharing
+            # their letters with another word are dropped from a given list.
+            if word_list is not None:
+                self.index = build_conundrum_index(word_list)
+                self.word_list = sorted(self.index.values())
+            else:
+                self.index = load_conundrum_index(n_letters)
+                self.word_list = self.generate_wordlist()
         self.original_word = self.generate_word() if (
                     original_word is None) else original_word
-        self.scrambled_word = scramble_word(self.original_word)
+        self.signature = letter_signature(self.original_word)
+        # Only an anagram of the word could make a scramble that is itself a
+        # word, so the game's own words with these letters are all the
+        # scramble needs checking against; no corpus is loaded for it.
+        if word_list is not None:
+            anagrams = {word.upper() for word in word_list
+                        if letter_signature(word) == self.signature}
+        else:
+            anagrams = {self.index[self.signature]} if (
+                        self.signature in self.index) else set()
+        with instrumentation.timer("conundrum.scramble"):
+            self.scrambled_word = scramble_word(self.original_word,
+                                                dictionary=anagrams)
         self.timer = timer  # seconds
 
     def check_answer(self, answer):
-        if answer.upper() == self.original_word:
+        """Check an answer by looking up its letters' signature.
+
+        Conundrum words are the only words with their letters, so the answer
+        is right exactly when the lookup of its signature returns it.
+        """
+        answer = answer.upper()
+        signature = letter_signature(answer)
+        if signature == self.signature and self.index.get(
+                signature, self.original_word.upper()) == answer:
             return True, "Correct!"
         else:
             return False, "Incorrect, try again."
 
     def generate_word(self):
-        """Generate a word of n_letters length."""
-        return self.rng.choice(self.word_list).upper()
+        """Generate a word of n_letters length with no other anagram."""
+        if not self.word_list:
+            raise ValueError("No conundrum words: every word has an anagram.")
+        return self.word_list[self.rng.integers(len(self.word_list))].upper()
 
     def generate_wordlist(self):
-        """Generate a list of n-letter words using NLTK."""
-        nltk.download('words')  # Only needed once
-        word_list = nltk.corpus.words.words()
-        return [word.upper() for word in word_list if len(word) == self.n_letters]
+        """Return the shared, sorted list of n-letter words with no other anagram."""
+        return load_conundrum_words(self.n_letters)
 
 # A quick test
 if __name__ == "__main__":
+    if sys.argv[1:] == ["build"]:
+        words = build_conundrum_word_list()
+        print(f"Saved {len(words)} conundrum words to {CONUNDRUM_WORD_LIST_PATH}")
+        sys.exit()
+
     game = ConundrumGame()
     print(f"Scrambled: {game.scrambled_word}")
     print(f"Original: {game.original_word}")
@@ -0,0 +1,140 @@
+"""Cached word definitions for the word games.
+
+WordNet is slow to load and each lookup is not free, so definitions go
+through a shared DefinitionService:
+    - recent definitions are kept in an LRU cache,
+    - a batch of words can be looked up in one call,
+    - likely answers can be prefetched on a background thread while the
+      round timer runs,
+    - definitions precomputed to resources/conundrum_definitions.json are
+      served from disk without touching WordNet.
+
+Precompute the definitions of every nine-letter word with:
+
+    python definitions.py
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from nltk.corpus import wordnet
+
+from instrumentation import count, timer
+from wordstore import ensure_nltk_corpus, get_word_store
+
+NO_DEFINITION = "...actually, no definition found."
+DEFAULT_DEFINITIONS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources",
+    "conundrum_definitions.json")
+
+_service = None
+_service_lock = threading.Lock()
+# WordNet's lazy loader is not safe to initialise from two threads at once.
+_wordnet_lock = threading.Lock()
+
+
+def lookup_wordnet_definition(word):
+    """Return WordNet's first definition of word, uncached."""
+    ensure_nltk_corpus('wordnet')
+    count("definitions.wordnet_lookups")
+    with timer("definitions.wordnet_lookup"), _wordnet_lock:
+        syns = wordnet.synsets(word)
+    try:
+        definition = syns[0].definition()
+    except IndexError:
+        definition = NO_DEFINITION
+    return definition
+
+
+def build_definitions_file(words, path=DEFAULT_DEFINITIONS_PATH):
+    """Look up every word in WordNet and save {WORD: definition} as JSON."""
+    definitions = {word.upper(): lookup_wordnet_definition(word)
+                   for word in words}
+    with open(path, "w") as f:
+        json.dump(definitions, f, indent=0, sort_keys=True)
+    return definitions
+
+
+class DefinitionService:
+    def __init__(self, maxsize=1024, path=DEFAULT_DEFINITIONS_PATH):
+        """Definition lookups with an LRU cache and precomputed answers.
+
+        Args:
+            maxsize (int): Most definitions to keep in the LRU cache
+            path (str): JSON of precomputed definitions, loaded on first use
+                if it exists
+        """
+        self.maxsize = maxsize
+        self.path = path
+        self._cache = OrderedDict()
+        self._precomputed = None
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def precomputed(self):
+        """Dict of precomputed definitions, keyed by upper-case word."""
+        if self._precomputed is None:
+            if self.path is not None and os.path.exists(self.path):
+                with open(self.path) as f:
+                    self._precomputed = json.load(f)
+            else:
+                self._precomputed = {}
+        return self._precomputed
+
+    def get_definition(self, word):
+        """Return the definition of word, from cache, disk or WordNet."""
+        key = word.upper()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                count("definitions.cache_hits")
+                return self._cache[key]
+
+        definition = self.precomputed.get(key)
+        count("definitions.precomputed_hits", int(definition is not None))
+        if definition is None:
+            definition = lookup_wordnet_definition(word)
+
+        with self._lock:
+            self._cache[key] = definition
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return definition
+
+    def get_definitions(self, words):
+        """Return {word: definition} for a batch of words."""
+        return {word: self.get_definition(word) for word in words}
+
+    def prefetch(self, words):
+        """Start looking up words on a background thread.
+
+        Returns:
+            Future: Resolves to get_definitions(words) once done.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="definitions")
+        return self._executor.submit(self.get_definitions, list(words))
+
+
+def get_definition_service():
+    """Return the process-wide DefinitionService."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = DefinitionService()
+    return _service
+
+
+if __name__ == "__main__":
+    words = get_word_store().by_length(9)
+    build_definitions_file(words)
+    print(f"Saved definitions of {len(words)} words to {DEFAULT_DEFINITIONS_PATH}")
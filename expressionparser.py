@@ -0,0 +1,177 @@
+"""Safe evaluation of numbers-round answers.
+
+Player answers such as "(100 + 6) x 3 - 75 / 25" are tokenised and parsed
+with a small recursive-descent parser instead of eval(). Only whole numbers,
++ - x / (also written * and the symbols − × ÷) and parentheses are allowed,
+and the game's rules are enforced while evaluating:
+    - every intermediate result is a positive integer (no fractions,
+      negatives or zero),
+    - each dealt number is used at most as many times as it was dealt.
+Expressions are capped in length, number size, nesting depth and value, so
+no submission can make evaluation expensive.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+MAX_EXPRESSION_LENGTH = 200
+MAX_NUMBER_DIGITS = 4
+MAX_DEPTH = 16
+MAX_VALUE = 10 ** 12
+
+# Accepted spellings of each operator.
+OPERATORS = {
+    '+': '+',
+    '-': '-', '−': '-', '–': '-',
+    '*': '*', 'x': '*', 'X': '*', '×': '*',
+    '/': '/', '÷': '/',
+    '(': '(', ')': ')',
+}
+
+# [0-9] rather than \d, which also matches other scripts' digits.
+_TOKEN = re.compile(r"\s*(?:([0-9]+)|(\S))")
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that are malformed or break the rules."""
+
+
+def tokenize(expression):
+    """Split an expression into ints and the operators + - * / ( )."""
+    if not isinstance(expression, str):
+        raise ExpressionError("Expression must be a string.")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(
+            f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters.")
+    tokens = []
+    for match in _TOKEN.finditer(expression.rstrip()):
+        number, symbol = match.groups()
+        if number is not None:
+            if len(number) > MAX_NUMBER_DIGITS:
+                raise ExpressionError(f"Number {number} is too large.")
+            tokens.append(int(number))
+        elif symbol in OPERATORS:
+            tokens.append(OPERATORS[symbol])
+        else:
+            raise ExpressionError(f"Unexpected character: {symbol!r}")
+    if not tokens:
+        raise ExpressionError("Empty expression.")
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+        self.used = []
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def parse(self):
+        value = self.expression()
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"Unexpected {self.peek()!r}.")
+        return value
+
+    def expression(self):
+        value = self.term()
+        while self.peek() in ('+', '-'):
+            op = self.tokens[self.pos]
+            self.pos += 1
+            value = apply_operation(value, op, self.term())
+        return value
+
+    def term(self):
+        value = self.factor()
+        while self.peek() in ('*', '/'):
+            op = self.tokens[self.pos]
+            self.pos += 1
+            value = apply_operation(value, op, self.factor())
+        return value
+
+    def factor(self):
+        token = self.peek()
+        self.pos += 1
+        if isinstance(token, int):
+            self.used.append(token)
+            return token
+        if token == '(':
+            self.depth += 1
+            if self.depth > MAX_DEPTH:
+                raise ExpressionError("Too many nested brackets.")
+            value = self.expression()
+            if self.peek() != ')':
+                raise ExpressionError("Missing closing bracket.")
+            self.pos += 1
+            self.depth -= 1
+            return value
+        if token is None:
+            raise ExpressionError("Expression ends too early.")
+        raise ExpressionError(f"Unexpected {token!r}.")
+
+
+def apply_operation(x, op, y):
+    """Return x op y, raising ExpressionError unless it is a positive integer."""
+    if op in ('+', '*'):
+        value = x + y if op == '+' else x * y
+        if value > MAX_VALUE:
+            raise ExpressionError(f"{x} {op} {y} is too large.")
+        return value
+    if op == '-':
+        if x <= y:
+            raise ExpressionError(f"{x} - {y} is not a positive number.")
+        return x - y
+    if y == 0 or x % y:
+        raise ExpressionError(f"{x} / {y} is not a whole number.")
+    return x // y
+
+
+def evaluate(expression, numbers=None):
+    """Evaluate a numbers-round answer under the game's rules.
+
+    Args:
+        expression (str): E.g. "(25 - 5) x 7"
+        numbers (list): The dealt numbers; each may be used at most as often
+            as it appears. None skips this check.
+
+    Returns:
+        int: The value of the expression.
+
+    Raises:
+        ExpressionError: If the expression is malformed, too long, or
+            breaks a rule.
+    """
+    parser = _Parser(tokenize(expression))
+    value = parser.parse()
+    if numbers is not None:
+        overused = Counter(parser.used) - Counter(int(num) for num in numbers)
+        if overused:
+            raise ExpressionError(
+                "Uses numbers not available: "
+                f"{sorted(overused.elements())}")
+    return value
+
+
+def evaluate_batch(expressions, numbers=None):
+    """Evaluate many submissions, each distinct expression only once.
+
+    Returns:
+        tuple: (values, errors) where values is an int array with -1 for
+            invalid expressions and errors holds each one's error message,
+            or None if it is valid.
+    """
+    results = {}
+    for expression in expressions:
+        if expression not in results:
+            try:
+                results[expression] = (evaluate(expression, numbers), None)
+            except ExpressionError as e:
+                results[expression] = (-1, str(e))
+    values = np.array([results[expression][0] for expression in expressions],
+                      dtype=np.int64)
+    errors = [results[expression][1] for expression in expressions]
+    return values, errors
@@ -0,0 +1,463 @@
+"""Asyncio engine that plays a full match of Countdown.
+
+A GameSession drives the six rounds plus the conundrum as a small state
+machine (session.state is the round being played, then "finished"). Players
+are anything with the async methods of Player, so console players, AI
+players or network clients can be mixed freely:
+
+    import asyncio
+    from gamesession import AIPlayer, GameSession
+    session = GameSession([AIPlayer("Ann", 0.6), AIPlayer("Bob", 0.8)])
+    scores = asyncio.run(session.run())
+
+Every answer is awaited under the round's real timer. Solving and word
+checking run in an executor so a slow solve never blocks other sessions;
+pass a ProcessPoolExecutor to spread many concurrent matches over cores
+(see run_sessions).
+"""
+
+import asyncio
+import copy
+import sys
+import threading
+
+import numpy as np
+
+import instrumentation
+from conundrumgame import ConundrumGame
+from lettersgame import LettersGame
+from numbersgame import NumbersGame
+
+# (round type, index of the player choosing the letters or numbers).
+ROUNDS = (
+    ("letters", 0),
+    ("letters", 1),
+    ("numbers", 0),
+    ("letters", 1),
+    ("letters", 0),
+    ("numbers", 1),
+    ("conundrum", None),
+)
+
+CONUNDRUM_POINTS = 10
+
+
+
+class ConsoleReader:
+    def __init__(self, stream=None):
+        """The one reader of stdin, shared by every ConsolePlayer.
+
+        A background thread reads lines as they are typed and hands each to
+        the prompt showing at the time. Prompts are shown one at a time, in
+        the order they are asked, so two players at one terminal answer in
+        turn within the round's timer. A prompt that times out is simply
+        abandoned: lines typed while no prompt is showing are dropped
+        rather than answering the next one.
+
+        Args:
+            stream (file): Where lines come from; defaults to sys.stdin
+        """
+        self.stream = stream
+        self._loop = None
+        self._lines = None
+        self._prompt_lock = None
+        self._thread = None
+        self._closed = False
+
+    async def readline(self, prompt):
+        """Show prompt and return the next line, or None once input ends."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and locks belong to one event loop (one asyncio.run).
+            self._loop = loop
+            self._lines = asyncio.Queue()
+            self._prompt_lock = asyncio.Lock()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._read, daemon=True)
+            self._thread.start()
+        async with self._prompt_lock:
+            if self._closed:
+                return None
+            while not self._lines.empty():
+                self._lines.get_nowait()
+            print(prompt, end="", flush=True)
+            return await self._lines.get()
+
+    def _read(self):
+        stream = sys.stdin if self.stream is None else self.stream
+        while True:
+            line = stream.readline()
+            if not line:
+                self._closed = True
+            loop, lines = self._loop, self._lines
+            try:
+                loop.call_soon_threadsafe(lines.put_nowait,
+                                          line if line else None)
+            except RuntimeError:
+                pass  # That session's event loop has finished.
+            if not line:
+                return
+
+
+CONSOLE = ConsoleReader()
+
+
+def ai_letter_type(letters, rng):
+    """Return an AI player's choice, "v" or "c", given the letters so far."""
+    n_vowels = sum(letter in "AEIOU" for letter in letters)
+    if n_vowels < 3 and len(letters) >= 5:
+        return "v"
+    if n_vowels >= 5:
+        return "c"
+    return "v" if rng.random() < 0.4 else "c"
+
+
+def pick_rack_letter(deck, choice, counts, rng=None):
+    """Draw the letter a player asked for: a vowel for "v", else a consonant.
+
+    If that pool is used up, the other kind is drawn instead.
+    """
+    picks = ((deck.pick_vowel, deck.pick_consonant) if choice == "v"
+             else (deck.pick_consonant, deck.pick_vowel))
+    try:
+        return picks[0](counts, rng)
+    except ValueError:
+        return picks[1](counts, rng)
+
+
+def score_letters(letters, answers, min_word_length=4, solver="index"):
+    """Check a letters round's answers and find the best words.
+
+    Module-level so it can run in a process pool.
+
+    Returns:
+        tuple: (length of each valid answer, 0 if invalid; up to three of
+            the longest words)
+    """
+    game = LettersGame(letters=letters, min_word_length=min_word_length,
+                       solver=solver)
+    lengths = [len(answer) if answer and game.check_answer(answer)[0] else 0
+               for answer in answers]
+    return lengths, game.longest_words(k=3)
+
+
+def solve_numbers(numbers, target, time_budget=None):
+    """Return (value, steps, proven_optimal) for a numbers round.
+
+    Module-level so it can run in a process pool.
+    """
+    game = NumbersGame(numbers=numbers, target=target)
+    return game.anytime_answer(time_budget=time_budget)
+
+
+class Player:
+    def __init__(self, name):
+        """Interface for a player; every method is awaited under a timer.
+
+        Returning None (or running out of time) means no answer.
+        """
+        self.name = name
+
+    async def pick_letter_type(self, letters):
+        """Return "v" for a vowel or "c" for a consonant."""
+        raise NotImplementedError
+
+    async def pick_large_numbers(self):
+        """Return how many large numbers (0-4) to play with."""
+        raise NotImplementedError
+
+    async def letters_answer(self, game):
+        """Return a word made from game.letters."""
+        raise NotImplementedError
+
+    async def numbers_answer(self, game):
+        """Return an expression using game.numbers, e.g. "(100 + 6) x 3".
+
+        It is graded with NumbersGame.score_solution, so a bare number
+        that was not dealt scores nothing.
+        """
+        raise NotImplementedError
+
+    async def conundrum_answer(self, game):
+        """Return the unscrambled game.scrambled_word."""
+        raise NotImplementedError
+
+
+class ConsolePlayer(Player):
+    def __init__(self, name, console=CONSOLE):
+        """A human typing answers at the terminal.
+
+        Args:
+            console (ConsoleReader): Shared reader of the terminal's input
+        """
+        super().__init__(name)
+        self.console = console
+
+    async def _input(self, prompt):
+        """Return the stripped line typed, or None once input has ended."""
+        line = await self.console.readline(f"{self.name}, {prompt}")
+        return None if line is None else line.strip()
+
+    async def pick_letter_type(self, letters):
+        while True:
+            choice = await self._input(
+                f"letters so far: {' '.join(letters)}. (v)owel or (c)onsonant? ")
+            if choice is None or choice.lower() in ("v", "c"):
+                return choice and choice.lower()
+            print("Please type 'v' for vowel or 'c' for consonant.")
+
+    async def pick_large_numbers(self):
+        while True:
+            choice = await self._input("how many large numbers (0-4)? ")
+            if choice is None:
+                return None
+            if choice.isdigit() and 0 <= int(choice) <= 4:
+                return int(choice)
+            print("Please choose between 0 and 4.")
+
+    async def letters_answer(self, game):
+        word = await self._input("your word: ")
+        return word.upper() if word else None
+
+    async def numbers_answer(self, game):
+        expression = await self._input("your working, e.g. (100 + 6) x 3: ")
+        return expression or None
+
+    async def conundrum_answer(self, game):
+        word = await self._input("the conundrum is: ")
+        return word.upper() if word else None
+
+
+class AIPlayer(Player):
+    def __init__(self, name, skill_level=0.5, think_time=0.0, rng=None):
+        """Computer player using the games' human-guess models.
+
+        Args:
+            skill_level (float): 0-1, passed to generate_human_guess and used
+                as the chance of solving the conundrum
+            think_time (float): Seconds to wait before each answer
+            rng (np.random.Generator): Source of randomness
+        """
+        super().__init__(name)
+        self.skill_level = skill_level
+        self.think_time = think_time
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    async def pick_letter_type(self, letters):
+        return ai_letter_type(letters, self.rng)
+
+    async def pick_large_numbers(self):
+        return int(self.rng.choice(5, p=[0.1, 0.4, 0.4, 0.05, 0.05]))
+
+    async def letters_answer(self, game):
+        await asyncio.sleep(self.think_time)
+        # A copy with this player's rng, as both players guess concurrently.
+        game = copy.copy(game)
+        game.rng = self.rng
+        try:
+            return await asyncio.to_thread(game.generate_human_guess,
+                                           skill_level=self.skill_level)
+        except ValueError:
+            return None
+
+    async def numbers_answer(self, game):
+        await asyncio.sleep(self.think_time)
+        game = copy.copy(game)
+        game.rng = self.rng
+        return await asyncio.to_thread(self._numbers_expression, game)
+
+    def _numbers_expression(self, game):
+        """Guess near the closest reachable value, then show working for it."""
+        table = game.reachable_table()
+        guess = game.generate_human_guess(
+                    skill_level=self.skill_level,
+                    reference=table.closest(game.target))
+        # A player can only declare a value they have actually made.
+        return table.expression(table.closest(guess))
+
+    async def conundrum_answer(self, game):
+        await asyncio.sleep(self.think_time)
+        if self.rng.random() < self.skill_level:
+            return game.original_word
+        return None
+
+
+class GameSession:
+    def __init__(self, players, timer=45, executor=None, announce=print,
+                    rounds=ROUNDS):
+        """One two-player match.
+
+        Args:
+            players (list): Two Player instances
+            timer (int): Seconds per round, given to each game's timer
+            executor (Executor): Where solving and word checks run; None
+                uses the event loop's default thread pool
+            announce (callable): Called with each public message; None
+                keeps the session silent
+            rounds (tuple): Round sequence, as ROUNDS
+        """
+        if len(players) != 2:
+            raise ValueError("A match needs exactly two players.")
+        self.players = players
+        self.timer = timer
+        self.executor = executor
+        self.announce = announce
+        self.rounds = rounds
+        self.scores = [0, 0]
+        self.state = "waiting"
+        self.round_index = None
+        # One dict per round played, for reviewing the match.
+        self.history = []
+
+    async def run(self):
+        """Play every round in order and return the final scores."""
+        handlers = {
+            "letters": self.play_letters_round,
+            "numbers": self.play_numbers_round,
+            "conundrum": self.play_conundrum_round,
+        }
+        names = " and ".join(player.name for player in self.players)
+        self._say(f"Welcome to Countdown, {names}!")
+        for self.round_index, (kind, chooser) in enumerate(self.rounds):
+            self.state = kind
+            self._say(f"\nRound {self.round_index + 1}: {kind}")
+            with instrumentation.timer("session.round", kind=kind):
+                result = await handlers[kind](chooser)
+            self.history.append(result)
+            self._say(self._score_line())
+        self.state = "finished"
+        self._say(f"Final scores: {self._score_line()}")
+        return self.scores
+
+    async def play_letters_round(self, chooser):
+        game = LettersGame(timer=self.timer)
+        # The rack is solved letter by letter as it is picked.
+        rack = await asyncio.to_thread(game.incremental_rack)
+        game.letters = await self._pick_letters(self.players[chooser],
+                                                game.deck, rack)
+        game.cache_rack(rack)
+        self._say(f"The letters are: {' '.join(game.letters)}")
+
+        answers = await self._ask_both(
+            [player.letters_answer(game) for player in self.players], game.timer)
+        lengths, best_words = await self._run(
+            score_letters, game.letters, answers, game.min_word_length,
+            game.solver)
+        points = game.determine_point_dividend(*lengths)
+        self._award(points)
+        for player, answer, length in zip(self.players, answers, lengths):
+            verdict = f"{length} letters" if length else "not valid"
+            self._say(f"{player.name}: {answer} ({verdict})")
+        self._say(f"Dictionary corner: {', '.join(best_words) or 'no words'}")
+        return {"round": "letters", "letters": game.letters,
+                "answers": answers, "points": points, "best_words": best_words}
+
+    async def play_numbers_round(self, chooser):
+        n_large = await self._ask(self.players[chooser].pick_large_numbers(),
+                                  self.timer)
+        if n_large is None or not 0 <= n_large <= 4:
+            n_large = 1
+        game = NumbersGame(numbers=[], target=100, timer=self.timer)
+        game.numbers = [int(num) for num in game.generate_number_set(n_large)]
+        game.target = int(game.generate_target())
+        self._say(f"The numbers are {game.numbers}; the target is {game.target}.")
+
+        # The solver runs while the players think, within the same timer.
+        solve = self._run(solve_numbers, game.numbers, game.target, game.timer)
+        # Built once, before AI players copy the game, so they share it.
+        await asyncio.to_thread(game.reachable_table)
+        answers = await self._ask_both(
+            [player.numbers_answer(game) for player in self.players], game.timer)
+        value, steps, _ = await solve
+        grades = [game.score_solution(answer) if answer is not None
+                  else (0, None, "No answer.") for answer in answers]
+        points = tuple(grade[0] for grade in grades)
+        self._award(points)
+        for player, (_, _, message) in zip(self.players, grades):
+            self._say(f"{player.name}: {message}")
+        self._say(f"Genius Robot reached {value} in {len(steps)} steps.")
+        return {"round": "numbers", "numbers": game.numbers,
+                "target": game.target, "answers": answers,
+                "values": [grade[1] for grade in grades], "points": points,
+                "best_value": value}
+
+    async def play_conundrum_round(self, chooser):
+        game = await asyncio.to_thread(ConundrumGame, timer=self.timer)
+        self._say(f"The conundrum is: {game.scrambled_word}")
+
+        tasks = {asyncio.ensure_future(self._ask(player.conundrum_answer(game),
+                                                 game.timer)): index
+                 for index, player in enumerate(self.players)}
+        winner, answers = None, [None, None]
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                answers[tasks[task]] = task.result()
+                if answers[tasks[task]] and game.check_answer(
+                        answers[tasks[task]])[0]:
+                    winner = tasks[task]
+                    break
+        for task in pending:
+            task.cancel()
+
+        points = [0, 0]
+        if winner is not None:
+            points[winner] = CONUNDRUM_POINTS
+            self._say(f"{self.players[winner].name} solved it!")
+        self._award(points)
+        self._say(f"The word was {game.original_word}.")
+        return {"round": "conundrum", "word": game.original_word,
+                "answers": answers, "points": tuple(points)}
+
+    async def _pick_letters(self, player, deck, rack, n_letters=9):
+        """Ask player for vowel or consonant until the rack is full."""
+        counts, letters = {}, []
+        while len(letters) < n_letters:
+            choice = await self._ask(player.pick_letter_type(list(letters)),
+                                     self.timer)
+            letter = pick_rack_letter(deck, choice, counts)
+            letters.append(letter)
+            counts[letter] = counts.get(letter, 0) + 1
+            rack.add(letter)
+        return letters
+
+    async def _ask(self, coroutine, timeout):
+        """Await a player's coroutine, returning None if time runs out."""
+        try:
+            return await asyncio.wait_for(coroutine, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _ask_both(self, coroutines, timeout):
+        return list(await asyncio.gather(
+            *(self._ask(coroutine, timeout) for coroutine in coroutines)))
+
+    def _run(self, func, *args):
+        """Run func(*args) in the executor, returning an awaitable."""
+        return asyncio.get_running_loop().run_in_executor(
+                    self.executor, func, *args)
+
+    def _award(self, points):
+        for index, n_points in enumerate(points):
+            self.scores[index] += int(n_points)
+
+    def _score_line(self):
+        return "    ".join(f"{player.name}: {score}"
+                           for player, score in zip(self.players, self.scores))
+
+    def _say(self, message):
+        if self.announce is not None:
+            self.announce(message)
+
+
+async def run_sessions(sessions):
+    """Play many matches concurrently and return each one's scores."""
+    return await asyncio.gather(*(session.run() for session in sessions))
+
+
+if __name__ == "__main__":
+    players = [AIPlayer("Player 1", skill_level=0.55, think_time=0.5),
+               AIPlayer("Player 2", skill_level=0.92, think_time=0.5)]
+    asyncio.run(GameSession(players).run())
@@ -0,0 +1,172 @@
+"""Opt-in timings and counters for the game classes.
+
+Instrumentation is off by default and costs one check per call site. Turn it
+on by installing a sink:
+
+    import instrumentation
+    sink = instrumentation.MemorySink()
+    with instrumentation.use_sink(sink):
+        NumbersGame(auto_pick=True).solve_numbers()
+    print(sink.totals())
+
+Each record is a dict with "name", "kind" ("timing" in seconds, "counter",
+or "profile"), "value", a "time" stamp and any tags given at the call site.
+Sinks:
+    - MemorySink keeps records in a list,
+    - JsonLinesSink appends them to a file, one JSON object per line,
+    - ProfileCapture wraps a block (e.g. a whole round) in cProfile and
+      tracemalloc and emits the result as one "profile" record.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_sink = None
+
+
+class MemorySink:
+    def __init__(self):
+        """Keep every record in memory."""
+        self.records = []
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def totals(self):
+        """Return {name: summed value} over all timing and counter records."""
+        totals = {}
+        for record in self.records:
+            if record["kind"] in ("timing", "counter"):
+                totals[record["name"]] = totals.get(record["name"], 0) + record["value"]
+        return totals
+
+
+class JsonLinesSink:
+    def __init__(self, path):
+        """Append each record to path as a line of JSON."""
+        self.path = path
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def set_sink(sink):
+    """Install sink (None disables instrumentation); return the previous one."""
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def get_sink():
+    """Return the installed sink, or None if instrumentation is off."""
+    return _sink
+
+
+@contextmanager
+def use_sink(sink):
+    """Install sink for the duration of a with block."""
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
+
+
+def emit(name, kind, value, **tags):
+    """Send one record to the installed sink, if any."""
+    sink = _sink
+    if sink is None:
+        return
+    record = {"name": name, "kind": kind, "value": value, "time": time.time()}
+    record.update(tags)
+    sink.emit(record)
+
+
+def count(name, value=1, **tags):
+    """Record a counter, e.g. nodes explored by a search."""
+    if _sink is not None:
+        emit(name, "counter", value, **tags)
+
+
+@contextmanager
+def timer(name, **tags):
+    """Record the wall time of a with block in seconds."""
+    if _sink is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit(name, "timing", time.perf_counter() - start, **tags)
+
+
+class ProfileCapture:
+    def __init__(self, name="round", top=25, memory=True, sink=None):
+        """Profile a block with cProfile and, optionally, tracemalloc.
+
+        On exit the top functions by cumulative time, the elapsed time and
+        the peak traced memory are kept on the object and emitted as one
+        "profile" record.
+
+        Args:
+            name (str): Record name
+            top (int): How many functions to keep in the report
+            memory (bool): Also trace peak memory (slows the block down)
+            sink: Where to emit the record; defaults to the installed sink
+        """
+        self.name = name
+        self.top = top
+        self.memory = memory
+        self.sink = sink
+        self.report = None
+        self.peak_memory_kb = None
+        self.elapsed = None
+
+    def __enter__(self):
+        self._started_tracing = self.memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        if self.memory:
+            tracemalloc.reset_peak()
+        self._profile = cProfile.Profile()
+        self._start = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profile.disable()
+        self.elapsed = time.perf_counter() - self._start
+        if self.memory:
+            self.peak_memory_kb = tracemalloc.get_traced_memory()[1] / 1024
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats(
+            "cumulative").print_stats(self.top)
+        self.report = stream.getvalue()
+
+        record = {"name": self.name, "kind": "profile", "value": self.elapsed,
+                  "time": time.time(), "peak_memory_kb": self.peak_memory_kb,
+                  "report": self.report}
+        sink = self.sink if self.sink is not None else _sink
+        if sink is not None:
+            sink.emit(record)
+        return False
@@ -1,6 +1,55 @@
 
 import random
 
+import numpy as np
+
+from instrumentation import count
+
+
+class _AliasTable:
+    def __init__(self, weights):
+        """Walker alias table: O(1) draws from a fixed discrete distribution.
+
+        Args:
+            weights (dict): letter -> non-negative weight
+        """
+        self.letters = list(weights)
+        n = len(self.letters)
+        total = sum(weights.values())
+        scaled = [weights[letter] * n / total for letter in self.letters]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        # Vose's method: pair each under-full column with an over-full one.
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Whatever is left is 1 up to rounding error.
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng=None):
+        """Draw one letter using the random module, or rng if given."""
+        if rng is None:
+            i = random.randrange(len(self.letters))
+            coin = random.random()
+        else:
+            i = int(rng.integers(len(self.letters)))
+            coin = rng.random()
+        if coin < self.prob[i]:
+            return self.letters[i]
+        return self.letters[self.alias[i]]
+
+    def sample_indices(self, rng, size):
+        """Draw letter indices in bulk from a NumPy Generator."""
+        columns = rng.integers(0, len(self.letters), size=size)
+        keep = rng.random(size) < np.asarray(self.prob)[columns]
+        return np.where(keep, columns, np.asarray(self.alias)[columns])
 
 
 class LetterDeck:
@@ -16,6 +65,11 @@ class LetterDeck:
     }
     VOWELS = set("AEIOU")
     CONSONANTS = set("BCDFGHJKLMNPQRSTVWXYZ")
+    MAX_PER_LETTER = 2
+    # Alias draws to reject before falling back to re-normalising the pool.
+    MAX_REJECTIONS = 32
+    # Racks generate_many draws at a time, bounding its working memory.
+    CHUNK_SIZE = 8192
 
     def __init__(self, power=0.5):
         """
@@ -24,6 +78,7 @@ class LetterDeck:
             - overall normalized frequencies,
             - normalized vowels frequencies,
             - normalized consonants frequencies.
+        and an alias table for each, so every pick is O(1).
         """
         self.adjusted_frequencies = self._adjust_frequencies(power)
         self.normalized_frequencies = self._normalize_frequencies(self.adjusted_frequencies)
@@ -33,8 +88,9 @@ class LetterDeck:
         self.normalized_vowel = self._normalize_frequencies(vowel_freq)
         self.normalized_consonant = self._normalize_frequencies(consonant_freq)
 
-
-
+        self.overall_table = _AliasTable(self.normalized_frequencies)
+        self.vowel_table = _AliasTable(self.normalized_vowel)
+        self.consonant_table = _AliasTable(self.normalized_consonant)
 
     def _adjust_frequencies(self, power):
         """Flatten the distribution using a power transformation."""
@@ -46,37 +102,56 @@ class LetterDeck:
         total = sum(freq_dict.values())
         return {letter: weight / total for letter, weight in freq_dict.items()}
 
-    def _pick_from_pool(self, pool, current_counts):
+    def _pick_from_pool(self, pool, table, current_counts, rng=None):
         """
         Generic helper: pick a letter from a given normalized pool,
         filtering out any letter that has already been chosen twice.
+
+        Letters are drawn from the pool's alias table and rejected if already
+        used up, which samples exactly the re-normalized distribution. Only
+        when the pool is nearly exhausted does it fall back to rebuilding it.
+        Draws use the random module unless a NumPy Generator rng is given.
         """
-        valid_letters = [letter for letter in pool if current_counts.get(letter, 0) < 2]
+        for draws in range(1, self.MAX_REJECTIONS + 1):
+            letter = table.sample(rng)
+            if current_counts.get(letter, 0) < self.MAX_PER_LETTER:
+                count("letterdeck.draws", draws)
+                return letter
+
+        count("letterdeck.fallbacks")
+        valid_letters = [letter for letter in pool
+                         if current_counts.get(letter, 0) < self.MAX_PER_LETTER]
         if not valid_letters:
             raise ValueError("No valid letters available to pick.")
         valid_weights = [pool[letter] for letter in valid_letters]
         # Re-normalize valid weights.
         total = sum(valid_weights)
         normalized_valid_weights = [w / total for w in valid_weights]
+        if rng is not None:
+            return valid_letters[rng.choice(len(valid_letters),
+                                            p=normalized_valid_weights)]
         return random.choices(valid_letters, weights=normalized_valid_weights, k=1)[0]
 
-    def pick_letter(self, current_counts):
+    def pick_letter(self, current_counts, rng=None):
         """
         Pick a letter from the overall pool, ensuring that no letter is picked more than twice.
         """
-        return self._pick_from_pool(self.normalized_frequencies, current_counts)
+        return self._pick_from_pool(self.normalized_frequencies, self.overall_table,
+                                    current_counts, rng)
 
-    def pick_vowel(self, current_counts):
+    def pick_vowel(self, current_counts, rng=None):
         """
         Pick a vowel from the vowel pool, ensuring that no vowel is picked more than twice.
         """
-        return self._pick_from_pool(self.normalized_vowel, current_counts)
+        return self._pick_from_pool(self.normalized_vowel, self.vowel_table,
+                                    current_counts, rng)
 
-    def pick_consonant(self, current_counts):
+    def pick_consonant(self, current_counts, rng=None):
         """
         Pick a consonant from the consonant pool, ensuring that no consonant is picked more than twice.
         """
-        return self._pick_from_pool(self.normalized_consonant, current_counts)
+        return self._pick_from_pool(self.normalized_consonant, self.consonant_table,
+                                    current_counts, rng)
 
     def generate_letters(self, n=9):
         """
@@ -113,4 +188,66 @@ class LetterDeck:
         random.shuffle(letters)
         return letters
 
+    def generate_many(self, n_racks, n=9, rng=None):
+        """
+        Generate n_racks racks of n letters at once from the overall pool.
+        Each rack follows the same distribution as generate_letters.
+
+        Candidates are drawn in bulk from the alias table; any letter beyond
+        its second copy in a rack is dropped and the rack keeps its first n
+        surviving letters. The rare rack left short is redrawn. Racks are
+        drawn CHUNK_SIZE at a time, so memory does not grow with n_racks
+        beyond the result itself.
+
+        Args:
+            n_racks (int): Number of racks
+            n (int): Letters per rack
+            rng (np.random.Generator): Source of randomness
+
+        Returns:
+            np.ndarray: (n_racks, n) array of single-letter strings.
+        """
+        if n > self.MAX_PER_LETTER * len(self.overall_table.letters):
+            raise ValueError("Too many letters for the two-per-letter rule.")
+        rng = np.random.default_rng() if rng is None else rng
+        letters = np.array(self.overall_table.letters)
+        racks = np.empty((n_racks, n), dtype=np.int64)
+        for start in range(0, n_racks, self.CHUNK_SIZE):
+            self._fill_racks(racks[start:start + self.CHUNK_SIZE], rng)
+        return letters[racks]
+
+    def _fill_racks(self, racks, rng):
+        """Fill each row of racks with letter indices, as generate_many."""
+        n = racks.shape[1]
+        todo = np.arange(len(racks))
+        n_candidates = 2 * n
+        while len(todo):
+            draws = self.overall_table.sample_indices(rng, (len(todo), n_candidates))
+            occurrence = self._occurrence(draws)
+            keep = occurrence <= self.MAX_PER_LETTER
+            keep &= np.cumsum(keep, axis=1) <= n
+            done = keep.sum(axis=1) == n
+            racks[todo[done]] = draws[done][keep[done]].reshape(-1, n)
+            todo = todo[~done]
+
+    @staticmethod
+    def _occurrence(draws):
+        """
+        Return how many times each draw's letter has appeared so far in its
+        row, counting itself.
+
+        A stable sort along each row puts equal letters next to each other
+        in draw order, so each one's count is its distance from the start of
+        its group. Memory stays proportional to draws, with no per-letter axis.
+        """
+        order = np.argsort(draws, axis=1, kind="stable")
+        ordered = np.take_along_axis(draws, order, axis=1)
+        position = np.arange(draws.shape[1])
+        starts = np.zeros(draws.shape, dtype=np.int64)
+        starts[:, 1:] = np.where(ordered[:, 1:] != ordered[:, :-1], position[1:], 0)
+        ranks = position - np.maximum.accumulate(starts, axis=1) + 1
+        occurrence = np.empty_like(ranks)
+        np.put_along_axis(occurrence, order, ranks, axis=1)
+        return occurrence
+
 # if __name__ == "__main__":
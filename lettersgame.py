@@ -18,23 +18,61 @@ In terms of how the script works when initialised:
 """
 
 import os
+import threading
+import time
+from collections import OrderedDict
 
 import numpy as np
-import nltk
-from nltk.corpus import wordnet
-nltk.download('wordnet')
 
+from definitions import get_definition_service
+import instrumentation
 from letterdeck import LetterDeck
+from rackcache import RackCache, RackResult, rack_key
+from rackgenerator import RackGenerator
+from wordindex import IncrementalRack, WordIndex, LetterCountMatrix
+from wordtrie import WordTrie
+from wordstore import WordStore, get_word_store
+
+# Word solvers available to LettersGame(solver=...).
+SOLVERS = {
+    "index": WordIndex,
+    "matrix": LetterCountMatrix,
+    "trie": WordTrie,
+}
+
+# Stores for recently used custom dictionaries, so their solvers are only
+# built once. Keyed by id(); the dictionary itself is held in the value so the
+# id cannot be recycled while the entry exists. Least recently used stores
+# are evicted; pass a WordStore as the dictionary to keep one for good.
+MAX_CUSTOM_STORES = 8
+_CUSTOM_STORES = OrderedDict()
+_custom_stores_lock = threading.Lock()
+
+# Valid words of recent racks, shared by every LettersGame in the process.
+RACK_CACHE = RackCache(maxsize=256)
 
 class LettersGame:
     def __init__(self, dictionary=None, letters=None, timer=45,
-                    min_word_length=4, auto_pick=False):
+                    min_word_length=4, auto_pick=False, solver="index"):
         """Letters game class for the Countdown game.
 
         TODO: if letters is none, generate
+
+        Args:
+            dictionary (iterable, WordStore): Words to play with; defaults
+                to the shared NLTK word store. Membership in a plain
+                collection is read live, but solvers are built from a
+                snapshot of it; pass a WordStore to share one store (and its
+                solvers) between games.
+            solver (str): Word search engine, a key of SOLVERS. "index" is
+                fastest per rack; "matrix" suits batches of racks;
+                "trie" searches longest words first.
         """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
         self.min_word_length = min_word_length
         self.dictionary = dictionary
+        self.solver = solver
         self.rng = np.random.default_rng()
 
         if letters is not None:
@@ -52,6 +90,9 @@ class LettersGame:
         counts = {}
         chosen_letters = []
         target_count = 9
+        # Solved letter by letter while the player picks, so the words are
+        # ready the moment the last letter lands.
+        rack = self.incremental_rack()
 
         print("Welcome to the Countdown Letter Picker!")
         print("You will choose 9 letters by specifying 'vowel' or 'consonant' each time.")
@@ -73,6 +114,7 @@ class LettersGame:
                     letter = self.deck.pick_consonant(counts)
                 chosen_letters.append(letter)
                 counts[letter] = counts.get(letter, 0) + 1
+                rack.add(letter)
                 print(f"You picked: {letter}\n")
             except ValueError as e:
                 print("Error:", e)
@@ -81,8 +123,18 @@ class LettersGame:
         print("Final set of letters:", " ".join(chosen_letters))
         # Controversial move here:
         self.letters = chosen_letters
+        self.cache_rack(rack)
         return chosen_letters
 
+    def incremental_rack(self):
+        """Return an empty IncrementalRack over this game's dictionary."""
+        return IncrementalRack(self.get_solver("index"),
+                               min_length=self.min_word_length)
+
+    def cache_rack(self, rack):
+        """Store a finished IncrementalRack's words as self.letters' result."""
+        RACK_CACHE.put(self.rack_key(), RackResult(rack.words))
+
     def generate_letters(self, letters=True):
         """Generate letters for the game.
 
@@ -109,6 +161,27 @@ class LettersGame:
         self.rng.shuffle(letters)
         return letters.tolist()
 
+    def generate_fair_letter_set(self, min_best_length=7, min_words=3,
+                                    num_letters=9):
+        """Generate letters guaranteed to allow good words.
+
+        Args:
+            min_best_length (int): The longest valid word must be this long
+            min_words (int): At least this many valid words
+            num_letters (int): Rack size
+        """
+        generator = RackGenerator(self.get_solver("index"), self.deck,
+                                  min_word_length=self.min_word_length)
+        return generator.generate(min_best_length=min_best_length,
+                                  min_words=min_words, n_letters=num_letters)
+
+    def rack_quality(self):
+        """Return (longest valid word length, number of valid words)."""
+        histogram = self.word_length_histogram()
+        if not histogram:
+            return 0, 0
+        return max(histogram), sum(histogram.values())
+
     def start_round(self):
         """Start a new round by generating new letters."""
         self.letters, _ = self.generate_letters()
@@ -119,66 +192,164 @@ class LettersGame:
         Args:
             word (str): Word to check
         """
+        # Once the rack is solved, a listed word is a set lookup away. Racks
+        # are solved from a snapshot, so not for a live custom dictionary.
+        word_upper = word.upper()
+        if self.dictionary is None or isinstance(self.dictionary, WordStore):
+            result = self.cached_rack_result()
+            if result is not None and word_upper in result.words:
+                return True, f"Valid word: {word}"
+
         # First check if word can be made from available letters
         letter_counts = {}
         for letter in self.letters:
             letter_counts[letter] = letter_counts.get(letter, 0) + 1
 
-        word_upper = word.upper()
         for letter in word_upper:
             if letter not in letter_counts or letter_counts[letter] == 0:
                 return False, f"'{word}' cannot be made from available letters"
             letter_counts[letter] -= 1
 
         # Then check if word exists in dictionary
-        if word_upper in self.dictionary:
+        if self.validate_word(word_upper):
             return True, f"Valid word: {word}"
         return False, f"'{word}' not found in dictionary"
 
     def validate_word(self, word):
-        """Validate if the word exists in the provided dictionary."""
+        """Validate if the word exists in the provided dictionary.
+
+        A plain custom dictionary is checked directly, so words the caller
+        adds or removes later are seen.
+        """
+        if self.dictionary is None or isinstance(self.dictionary, WordStore):
+            return word.upper() in self.get_word_store()
         return word.upper() in self.dictionary
 
+    def get_word_store(self):
+        """Return the WordStore for this game's dictionary.
+
+        Without a dictionary this is the process-wide NLTK store, and a
+        WordStore dictionary is used as is. Any other dictionary gets its own
+        store, shared by every game using it until it is one of more than
+        MAX_CUSTOM_STORES in use. The store is a snapshot, taken when it is
+        first needed.
+        """
+        if self.dictionary is None:
+            return get_word_store()
+        if isinstance(self.dictionary, WordStore):
+            return self.dictionary
+        key = id(self.dictionary)
+        with _custom_stores_lock:
+            if key in _CUSTOM_STORES:
+                _CUSTOM_STORES.move_to_end(key)
+                return _CUSTOM_STORES[key][1]
+        store = WordStore(self.dictionary)
+        with _custom_stores_lock:
+            _CUSTOM_STORES[key] = (self.dictionary, store)
+            _CUSTOM_STORES.move_to_end(key)
+            while len(_CUSTOM_STORES) > MAX_CUSTOM_STORES:
+                _CUSTOM_STORES.popitem(last=False)
+        return store
+
+    def get_solver(self, solver=None):
+        """Return the word solver for this game's dictionary.
+
+        Each solver is built on first use and shared by every LettersGame
+        using the same word store.
+
+        Args:
+            solver (str): Key of SOLVERS; defaults to self.solver
+        """
+        solver = self.solver if solver is None else solver
+        return self.get_word_store().get_solver(SOLVERS[solver])
+
+    def rack_key(self):
+        """Return the RACK_CACHE key for the current letters."""
+        return rack_key(self.get_word_store(), self.letters,
+                        self.min_word_length, self.solver)
+
+    def cached_rack_result(self):
+        """Return the current letters' RackResult if cached, else None."""
+        return RACK_CACHE.get(self.rack_key())
+
+    def rack_result(self):
+        """Return the RackResult for the current letters, solving on a miss.
+
+        Used where every valid word is needed anyway. Queries that need only
+        some of them (longest words, histogram, a guess) read the cache when
+        it has the rack and otherwise use the solver's early-stopping
+        searches.
+        """
+        key = self.rack_key()
+        result = RACK_CACHE.get(key)
+        if result is None:
+            with instrumentation.timer("letters.solve_rack", solver=self.solver):
+                result = RackResult(self.get_solver().words_from_rack(
+                            self.letters, min_length=self.min_word_length))
+            instrumentation.count("letters.valid_words", len(result),
+                                  solver=self.solver)
+            RACK_CACHE.put(key, result)
+        return result
+
     def get_valid_words(self, sort_by=None):
-        try:
-            nltk.data.find('corpora/words')
-        except LookupError:
-            nltk.download('words')
-
-        english_words = set(word.upper() for word in nltk.corpus.words.words())
-
-        # Filter valid words
-        possible_words = []
-        for word in english_words:
-            if len(word) >= self.min_word_length:
-                letter_counts = self.letters.copy()
-                can_make = True
-                for letter in word:
-                    if letter not in letter_counts or letter_counts.count(letter) == 0:
-                        can_make = False
-                        break
-                    letter_counts.remove(letter)
-                if can_make:
-                    possible_words.append(word)
-
-        if sort_by == "length":
-            possible_words.sort(key=len, reverse=True)
-
-        return possible_words
+        """Find every dictionary word that can be made from self.letters.
+
+        Args:
+            sort_by (str): "length" to sort longest first; the words are
+                always ranked longest first, then alphabetically
+
+        Returns:
+            list: Valid words of at least min_word_length letters.
+        """
+        return list(self.rack_result().ranked_words)
+
+    def get_valid_word_masks(self, racks):
+        """Check a batch of racks against the whole dictionary at once.
+
+        Args:
+            racks (list): Racks, each a list of letters
+
+        Returns:
+            tuple: (words, masks) where masks[i, j] says whether words[j]
+                can be made from racks[i].
+        """
+        matrix = self.get_solver("matrix")
+        masks = matrix.valid_masks(racks, min_length=self.min_word_length)
+        return matrix.words, masks
+
+    def ranked_words(self):
+        """Return every valid word, longest first, then alphabetically.
+
+        Compute it once per rack to make many guesses with
+        generate_human_guess(ranked_words=...).
+        """
+        return list(self.rack_result().ranked_words)
 
     def generate_human_guess(self, skill_level=0.5,
-                                    percentile_range=0.2):
+                                    percentile_range=0.2, ranked_words=None):
         """Generate a single word guess based on skill level.
 
         Args:
             skill_level (float): 0-1, determines word length percentile target
             min_letters (int): Minimum word length to consider
             percentile_range (float): Range around skill level for randomization
+            ranked_words (list): self.ranked_words() for the current letters,
+                to skip the search when guessing many times per rack
 
         Returns:
             str: A single word guess
         """
-        possible_words = self.get_valid_words(sort_by="length")
+        histogram = None
+        if ranked_words is None:
+            result = self.cached_rack_result()
+            if result is not None:
+                ranked_words = result.ranked_words
+            else:
+                histogram = self.word_length_histogram()
+        n_words = (len(ranked_words) if histogram is None
+                   else sum(histogram.values()))
+        if n_words == 0:
+            raise ValueError(f"No valid words can be made from {self.letters}.")
 
         # Calculate range bounds
         min_percentile = max(0.0, skill_level - percentile_range/2)
@@ -187,12 +358,102 @@ class LettersGame:
         # Random percentile within range
         actual_percentile = self.rng.uniform(min_percentile, max_percentile)
 
-        # Select word at that percentile
-        index = int(len(possible_words) * actual_percentile)
+        # Select word at that percentile of the longest-first ranking.
+        index = min(int(n_words * actual_percentile), n_words - 1)
+        if histogram is None:
+            return ranked_words[index]
+
+        # Not cached: the histogram says which length bucket holds that
+        # rank, so only that bucket's words are listed.
+        for length in sorted(histogram, reverse=True):
+            if index < histogram[length]:
+                break
+            index -= histogram[length]
+        bucket = sorted(self.get_solver().words_of_length(self.letters, length))
 
         # TODO: find optimal word to show as "dictionary corner" best answer.
 
-        return possible_words[index]
+        return bucket[index]
+
+    def longest_words(self, k=3):
+        """Return up to k of the longest valid words, longest first.
+
+        Unless the rack is cached, lengths are probed from nine letters
+        downwards, stopping early, so the full list of valid words is never
+        built or sorted.
+        """
+        result = self.cached_rack_result()
+        if result is not None:
+            return result.ranked_words[:k]
+        return self.get_solver().longest_words(
+                    self.letters, k=k, min_length=self.min_word_length)
+
+    def best_word(self, time_budget=None):
+        """Find the longest valid word within a time budget.
+
+        This is an anytime search. A cheap probe of the shortest allowed
+        length first gives a running best word. Lengths are then probed from
+        the whole rack downwards, so the first word found there is proven to
+        be the longest. The budget is checked between lengths; if it runs out
+        first, the running best is returned unproven. A rack already in
+        RACK_CACHE is answered from it.
+
+        Args:
+            time_budget (float): Seconds to search for; None searches to the
+                end. Pass self.timer to stay within the round.
+
+        Returns:
+            tuple: (word, proven_optimal); word is None if there is no valid
+                word, and proven_optimal is False if time ran out before a
+                longer word was ruled out.
+        """
+        result = self.cached_rack_result()
+        if result is not None:
+            return (result.ranked_words[0] if result else None), True
+
+        deadline = None if time_budget is None else (
+                        time.monotonic() + time_budget)
+        solver = self.get_solver()
+        words = solver.words_of_length(self.letters, self.min_word_length)
+        best = min(words) if words else None
+        shortest = self.min_word_length if best is None else len(best)
+        for length in range(len(self.letters), shortest, -1):
+            if deadline is not None and time.monotonic() >= deadline:
+                return best, False
+            words = solver.words_of_length(self.letters, length)
+            if words:
+                return min(words), True
+        return best, True
+
+    def word_length_histogram(self):
+        """Return {length: number of valid words of that length}."""
+        result = self.cached_rack_result()
+        if result is not None:
+            return dict(result.histogram)
+        return self.get_solver().length_histogram(
+                    self.letters, min_length=self.min_word_length)
+
+    def max_length_count(self, longest_word=None):
+        """Return (longest valid word length, how many words have it).
+
+        Args:
+            longest_word (str): A longest valid word, if already known, so
+                it is not searched for again
+        """
+        result = self.cached_rack_result()
+        if result is not None:
+            if not result.histogram:
+                return 0, 0
+            max_len = max(result.histogram)
+            return max_len, result.histogram[max_len]
+
+        if longest_word is None:
+            longest = self.longest_words(k=1)
+            if not longest:
+                return 0, 0
+            longest_word = longest[0]
+        max_len = len(longest_word)
+        return max_len, len(self.get_solver().words_of_length(self.letters, max_len))
 
     def dictionary_corner(self):
         """Generate the best possible word from the letters.
@@ -200,36 +461,47 @@ class LettersGame:
         TODO: it would be cool to have the word's meaning
         print(word.definition()), apparently.
         """
-        # Find possible words from the self.letters
-        # Sort by length
-        possible_words = self.get_valid_words(sort_by="length")
+        # Find the top three words from the self.letters, longest first
+        possible_words = self.longest_words(k=3)
+        with instrumentation.timer("letters.definitions"):
+            definitions = get_definition_service().get_definitions(possible_words)
 
-        # Max length word
-        max_len = len(possible_words[0])
+        # Max length word, and how many had that length
+        max_len, max_len_count = self.max_length_count(
+            longest_word=possible_words[0] if possible_words else None)
 
-        # How many had that length?
-        max_len_count = sum(len(word) == max_len for word in possible_words)
+        if not possible_words:
+            print("No valid words can be made from these letters.")
+            return
 
         print(f"The longest word possible is {max_len} letters long.")
         print(f"There are {max_len_count} words of that length.")
         print(f"The longest word is: {possible_words[0]}.")
-        print(f"This word means: {self.get_word_definition(possible_words[0])}.")
+        print(f"This word means: {definitions[possible_words[0]]}.")
 
-        print("The second and third longest words are:")
-        print(f"2. {possible_words[1]}, meaning: {self.get_word_definition(possible_words[1])}")
-        print(f"3. {possible_words[2]}, meaning: {self.get_word_definition(possible_words[2])}")
+        if len(possible_words) == 3:
+            print("The second and third longest words are:")
+        elif len(possible_words) == 2:
+            print("The second longest word is:")
+        for rank, word in enumerate(possible_words[1:], start=2):
+            print(f"{rank}. {word}, meaning: {definitions[word]}")
 
         # return possible_words[0]
         return
 
+    def prefetch_definitions(self, k=3):
+        """Look up the definitions of the top k words in the background.
+
+        Call while the round timer runs so the reveal never waits on WordNet.
+
+        Returns:
+            Future: Resolves to {word: definition}.
+        """
+        return get_definition_service().prefetch(self.longest_words(k=k))
+
     @staticmethod
     def get_word_definition(word):
-        syns = wordnet.synsets(word)
-        try:
-            definition = syns[0].definition()
-        except IndexError:
-            definition = "...actually, no definition found."
-        return definition
+        return get_definition_service().get_definition(word)
 
     @staticmethod
     def determine_point_dividend(player1, player2):
@@ -271,6 +543,7 @@ if __name__ == "__main__":
 
     print("Start timer")
     # TODO - add timer functionality as function, 45 sec usually
+    LG.prefetch_definitions()
 
     print(f"First player guess: {(player1_guess := 
                     LG.generate_human_guess(skill_level=0.55))}")
@@ -0,0 +1,118 @@
+"""Precomputed solvability of every legal numbers-round deal.
+
+A deal is 0-4 distinct large numbers from [25, 50, 75, 100] topped up to six
+with small numbers (1-10, at most two of each). For every deal and every
+target 100-999 the database stores the closest reachable value and the fewest
+operations needed to make it, so "is this solvable" is an array lookup.
+
+Build it once with:
+
+    python numbersdatabase.py
+
+which writes resources/numbers_solvability.npy. The file is opened
+memory-mapped, so every process using it shares the same pages.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, combinations_with_replacement
+
+import numpy as np
+
+from numbersolver import ReachableTable
+
+LARGE_NUMBERS = (25, 50, 75, 100)
+SMALL_NUMBERS = tuple(range(1, 11))
+N_NUMBERS = 6
+TARGET_LOW = 100
+TARGET_HIGH = 999
+
+DATABASE_DTYPE = np.dtype([('closest', '<i2'), ('n_steps', 'u1')])
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "resources", "numbers_solvability.npy")
+
+
+def enumerate_selections():
+    """Return every legal deal as a sorted tuple, in database row order."""
+    selections = []
+    for n_large in range(len(LARGE_NUMBERS) + 1):
+        for large in combinations(LARGE_NUMBERS, n_large):
+            for small in combinations_with_replacement(SMALL_NUMBERS,
+                                                       N_NUMBERS - n_large):
+                if any(small.count(num) > 2 for num in set(small)):
+                    continue
+                selections.append(tuple(sorted(small + large)))
+    return selections
+
+
+def summarise_selection(selection):
+    """Return one database row: closest value and steps for each target."""
+    table = ReachableTable(selection)
+    _, closest, n_steps = table.target_table(TARGET_LOW, TARGET_HIGH)
+    row = np.empty(TARGET_HIGH - TARGET_LOW + 1, dtype=DATABASE_DTYPE)
+    row['closest'] = closest
+    row['n_steps'] = n_steps
+    return row
+
+
+def build_database(path=DEFAULT_PATH, workers=None):
+    """Solve every deal and write the table to path.
+
+    Args:
+        path (str): Output .npy file
+        workers (int): Processes to use; defaults to the CPU count
+    """
+    selections = enumerate_selections()
+    table = np.empty((len(selections), TARGET_HIGH - TARGET_LOW + 1),
+                     dtype=DATABASE_DTYPE)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        rows = executor.map(summarise_selection, selections, chunksize=64)
+        for idx, row in enumerate(rows):
+            table[idx] = row
+            if (idx + 1) % 1000 == 0:
+                print(f"Solved {idx + 1}/{len(selections)} deals "
+                      f"({time.perf_counter() - start:.0f}s)")
+    np.save(path, table)
+    print(f"Wrote {len(selections)} deals to {path}")
+
+
+class SolvabilityDatabase:
+    def __init__(self, path=DEFAULT_PATH):
+        """Memory-mapped view of a database written by build_database.
+
+        Args:
+            path (str): The .npy file to open
+        """
+        self.table = np.load(path, mmap_mode='r')
+        self.selections = enumerate_selections()
+        if self.table.shape[0] != len(self.selections):
+            raise ValueError(f"{path} does not match the legal deals; rebuild it.")
+        self.row_index = {selection: idx
+                          for idx, selection in enumerate(self.selections)}
+
+    def row(self, numbers):
+        """Return the database row for a deal, in any order."""
+        key = tuple(sorted(int(num) for num in numbers))
+        try:
+            return self.table[self.row_index[key]]
+        except KeyError:
+            raise ValueError(f"Not a legal deal: {list(key)}") from None
+
+    def lookup(self, numbers, target):
+        """Return (solvable, closest, n_steps) for one deal and target."""
+        if not TARGET_LOW <= target <= TARGET_HIGH:
+            raise ValueError(f"Target must be between {TARGET_LOW} and {TARGET_HIGH}.")
+        entry = self.row(numbers)[int(target) - TARGET_LOW]
+        closest = int(entry['closest'])
+        return closest == target, closest, int(entry['n_steps'])
+
+    def solvable_targets(self, numbers):
+        """Return an array of every target the deal can make exactly."""
+        targets = np.arange(TARGET_LOW, TARGET_HIGH + 1)
+        return targets[self.row(numbers)['closest'] == targets]
+
+
+if __name__ == "__main__":
+    build_database()
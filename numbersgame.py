@@ -6,14 +6,27 @@ import time
 
 import numpy as np
 
+import instrumentation
+from expressionparser import ExpressionError, evaluate, evaluate_batch
+from numbersolver import (NumbersSolver, ReachableTable, best_solutions,
+                          build_steps, iter_solutions, solve_parallel)
+
 class NumbersGame:
-    def __init__(self, numbers=None, target=None, timer=45, auto_pick=False):
+    def __init__(self, numbers=None, target=None, timer=45, auto_pick=False,
+                    database=None, solvable_only=False):
         """Numbers game class for the Countdown game.
 
         TODO: if numbers or target is none, generate
+
+        Args:
+            database (SolvabilityDatabase): Precomputed deal table used for
+                O(1) solvability checks; without it they are solved live
+            solvable_only (bool): Only generate targets the numbers can make
         """
         self.rng = np.random.default_rng()  # Create RNG instance
         self.timer = timer
+        self.database = database
+        self._reachable = None
 
         if numbers is not None:
             self.numbers = numbers
@@ -23,21 +36,51 @@ class NumbersGame:
             else:
                 self.numbers = []
 
-        self.target = target if target is not None else self.generate_target()
+        self.target = target if target is not None else self.generate_target(
+                                            solvable_only=solvable_only)
 
-    def generate_target(self):
-        """Generate a target number between 100 and 999."""
-        return self.rng.integers(100, 1000)
+    def generate_target(self, solvable_only=False):
+        """Generate a target number between 100 and 999.
 
-    def generate_number_set(self):
-        """Generate the set of numbers to play with."""
+        Args:
+            solvable_only (bool): Only pick targets the numbers can make
+        """
+        if not solvable_only or len(self.numbers) == 0:
+            return self.rng.integers(100, 1000)
+        targets = self.solvable_targets()
+        if len(targets) == 0:
+            raise ValueError("No target between 100 and 999 can be made from these numbers.")
+        return self.rng.choice(targets)
+
+    def generate_number_set(self, n_large=1):
+        """Generate the set of numbers to play with.
+
+        Args:
+            n_large (int): How many of the six are large numbers (0-4)
+        """
+        if not 0 <= n_large <= 4:
+            raise ValueError("Choose between 0 and 4 large numbers.")
         large_numbers = np.array([25, 50, 75, 100])
         small_numbers = np.repeat(np.arange(1, 11), 2)
 
-        large_picks = self.rng.choice(large_numbers, size=1, replace=False)
-        small_picks = self.rng.choice(small_numbers, size=5, replace=False)
+        large_picks = self.rng.choice(large_numbers, size=n_large, replace=False)
+        small_picks = self.rng.choice(small_numbers, size=6 - n_large, replace=False)
         return np.concatenate([large_picks, small_picks])
 
+    def is_solvable(self, target=None):
+        """Return whether the target (default self.target) can be made exactly."""
+        target = self.target if target is None else target
+        if self.database is not None:
+            return self.database.lookup(self.numbers, target)[0]
+        return self.reachable_table().is_solvable(target)
+
+    def solvable_targets(self):
+        """Return every target 100-999 the current numbers can make exactly."""
+        if self.database is not None:
+            return self.database.solvable_targets(self.numbers)
+        return np.array([target for target in range(100, 1000)
+                         if self.reachable_table().is_solvable(target)])
+
     @staticmethod
     def get_operations():
         """Returns the valid operations for the numbers game."""
@@ -48,13 +91,113 @@ class NumbersGame:
             ('/', lambda x, y: x // y if y != 0 and x % y == 0 else None, "Divide")
         ]
 
-    def solve_numbers(self, explain=True):
+    def solve_numbers(self, explain=True, engine="memo", closest=True,
+                        workers=None, time_budget=None, pool=None):
         """Find a sequence of operations that uses the numbers to reach the target.
 
         I think it's being too complicated.
         It should rank solutions by simplicity.
         Maybe sample a subset of solutions if too long to run permutations.
+
+        Args:
+            explain (bool): Print the steps of the solution
+            engine (str): "memo" for the memoised NumbersSolver, or "dfs" for
+                the original exhaustive search
+            closest (bool): If the target is unreachable, return the steps to
+                the nearest reachable value instead (memo engine only)
+            workers (int): Split a hard memo search across this many processes
+            pool (SolverPool): Long-lived worker processes to split across
+            time_budget (float): Seconds the memo search may take before
+                settling for the closest value found so far
+
+        Returns:
+            list: Steps reaching the target (or the closest value), or None
+                if there is no solution.
+        """
+        proven_optimal = True
+        if engine == "memo":
+            value, solution, proven_optimal = self.anytime_answer(
+                                time_budget=time_budget, workers=workers,
+                                pool=pool)
+            if value != self.target and not closest:
+                solution = None
+        elif engine == "dfs":
+            value = self.target
+            with instrumentation.timer("numbers.solve", engine="dfs"):
+                solution = self._solve_numbers_dfs()
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+
+        if (solution is not None) and explain:
+            if value == self.target:
+                print("Solution found by Genius Robot:")
+            else:
+                print("No exact solution found. Closest answer by Genius Robot: "
+                      f"{value} ({abs(value - self.target)} away)")
+                if not proven_optimal:
+                    print("(Time ran out before the search finished; "
+                          "a closer answer may exist.)")
+            for idx, step in enumerate(solution, start=1):
+                print(f"Step {idx}:")
+                print(f"  Expression: {step['expression']}")
+                print(f"  Description: {step['description']}")
+                print(f"  Available Numbers: {[int(num) for num in step['available_numbers']]}\n")
+        elif solution is None:
+            print("No solution found.")
+
+        return solution
+
+    def best_answer(self, workers=None, pool=None):
+        """Find the target, or the nearest value to it, in a single search.
+
+        Args:
+            workers (int): Split the search across this many processes,
+                stopping them all once one reaches the target
+            pool (SolverPool): Long-lived worker processes to split across
+
+        Returns:
+            tuple: (value, steps) where value is the target if reachable and
+                steps are in solve_numbers' format.
         """
+        value, steps, _ = self.anytime_answer(workers=workers, pool=pool)
+        return value, steps
+
+    def anytime_answer(self, time_budget=None, workers=None, pool=None):
+        """Search for the target, settling for the closest value on time out.
+
+        Args:
+            time_budget (float): Seconds the search may take; None searches
+                to the end. Pass self.timer to stay within the round.
+            workers (int): Split the search across this many processes if
+                it proves hard
+            pool (SolverPool): Long-lived worker processes to split across
+
+        Returns:
+            tuple: (value, steps, proven_optimal) where proven_optimal is
+                False if time ran out before a closer value was ruled out.
+                Without numbers there is no answer: (None, None, True).
+        """
+        deadline = None if time_budget is None else (
+                        time.monotonic() + time_budget)
+        if workers is not None or pool is not None:
+            with instrumentation.timer("numbers.solve", engine="parallel"):
+                value, path, proven_optimal = solve_parallel(
+                        self.numbers, self.target, workers, deadline=deadline,
+                        pool=pool)
+        else:
+            solver = NumbersSolver(self.numbers, self.target, deadline=deadline)
+            with instrumentation.timer("numbers.solve", engine="memo"):
+                value, path = solver.solve_closest()
+            proven_optimal = solver.proven_optimal
+            instrumentation.count("numbers.nodes_explored", solver.nodes)
+            instrumentation.count("numbers.dead_states",
+                                  len(solver.dead_states))
+        if path is None:
+            return None, None, True
+        return value, build_steps(self.numbers, path), proven_optimal
+
+    def _solve_numbers_dfs(self):
+        """Exhaustive, unmemoised search; kept to compare engines against."""
         def helper(current_numbers, steps):
             if self.target in current_numbers:
                 return steps
@@ -86,32 +229,79 @@ class NumbersGame:
                                 return solution
             return None
 
-        solution = helper(self.numbers, [])
+        return helper(self.numbers, [])
 
-        if (solution is not None) and explain:
-            print("Solution found by Genius Robot:")
-            for idx, step in enumerate(solution, start=1):
-                print(f"Step {idx}:")
-                print(f"  Expression: {step['expression']}")
-                print(f"  Description: {step['description']}")
-                print(f"  Available Numbers: {[int(num) for num in step['available_numbers']]}\n")
-        else:
-            print("No solution found.")
+    def iter_solutions(self):
+        """Yield the steps of every distinct solution, as they are found.
 
-        return solution
+        Solutions that differ only in the order or bracketing of additions
+        or multiplications are yielded once.
+        """
+        for path in iter_solutions(self.numbers, self.target):
+            yield build_steps(self.numbers, path)
+
+    def best_solutions(self, k=3):
+        """Return the steps of the k simplest distinct solutions.
+
+        Simplest means fewest steps, then the smallest intermediate values.
+        Only the fewest-step depths are searched, so an ordinary deal is
+        answered in well under a second.
+        """
+        return [build_steps(self.numbers, path)
+                for path in best_solutions(self.numbers, self.target, k=k)]
+
+    def reachable_table(self):
+        """Return the ReachableTable for the current numbers.
+
+        Computed once per selection of numbers; it answers solvability,
+        closest value and simplest solution for every target without a
+        fresh search.
+        """
+        key = tuple(int(num) for num in self.numbers)
+        if self._reachable is None or self._reachable[0] != key:
+            self._reachable = (key, ReachableTable(self.numbers))
+        return self._reachable[1]
 
     def check_solution(self, expression):
         # Evaluate the expression safely and check if it equals target
         # TODO: see how this works in real-time with CLI then GUI
         try:
-            result = eval(expression, {"__builtins__": None}, {})
+            result = evaluate(expression, self.numbers)
             if result == self.target:
                 return True, f"Correct! {expression} = {self.target}"
             else:
                 return False, f"Incorrect: {expression} = {result}, target was {self.target}"
-        except Exception as e:
+        except ExpressionError as e:
             return False, f"Error in expression: {e}"
 
+    def score_solution(self, expression):
+        """Grade a player's expression like check_solution, with points.
+
+        Returns:
+            tuple: (points, value, message) where value is None if the
+                expression is invalid, which scores no points.
+        """
+        try:
+            value = evaluate(expression, self.numbers)
+        except ExpressionError as e:
+            return 0, None, f"Error in expression: {e}"
+        return (self.lookup_points_awarded(value), value,
+                self.check_solution(expression)[1])
+
+    def check_solutions(self, expressions):
+        """Grade a batch of submitted expressions at once.
+
+        Repeated expressions are only parsed once.
+
+        Returns:
+            tuple: (correct, values, errors) where correct is a bool array,
+                values holds each expression's value (-1 if invalid) and
+                errors each one's error message, or None.
+        """
+        values, errors = evaluate_batch(expressions, self.numbers)
+        correct = values == int(self.target)
+        return correct, values, errors
+
     def lookup_points_awarded(self, answer):
         """Lookup points awarded based on distance from target.
         """
@@ -125,22 +315,29 @@ class NumbersGame:
         else:
             return 0
 
-    def generate_human_guess(self, skill_level=0.5):
+    def generate_human_guess(self, skill_level=0.5, reference=None):
         """Generate a value mimicking human guess based on skill level.
 
         We assume the method is correct, for now, for simplicity.
 
+        Args:
+            skill_level (float): 0-1, chance of a close guess
+            reference (int): Value close guesses land near; defaults to the
+                target. Pass the closest reachable value (one solve per
+                deal) so players cannot beat what the numbers allow.
+
         Returns:
             int: The guess value.
         """
         if skill_level < 0 or skill_level > 1:
             raise ValueError("Skill level must be between 0 and 1.")
+        reference = self.target if reference is None else reference
 
         # Randomly decide if the player will be within 10 of the target
         close_guess = self.rng.random() < skill_level
         if close_guess:
             deviation = int(round(self.rng.normal(0, 2)))
-            return self.target + deviation
+            return reference + deviation
         else:
             return self.rng.integers(1, 101)
 
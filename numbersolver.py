@@ -0,0 +1,615 @@
+"""Search engines for the Countdown numbers round.
+
+States are canonicalised as tuples sorted largest first, so the same multiset
+of numbers reached in a different order is only explored once. Moves are
+recorded as light (x, op, y, result) tuples and turned into printable steps
+only for the winning path.
+
+ReachableTable instead answers every target at once: a dynamic programme over
+subsets of the numbers records every value each subset can make, so one
+precomputation covers "is it solvable", "what is closest" and "what is the
+simplest way" for all targets.
+
+iter_solutions and best_solutions enumerate every distinct solution, where
+expressions equal up to commutativity and associativity count once.
+
+solve_parallel splits the first moves of a hard search across worker
+processes (ideally a long-lived SolverPool) and stops them all as soon as one
+finds the target.
+
+Both searches run in "anytime" mode when given a deadline: they return the
+closest value found when time runs out and report whether it is proven
+optimal, so a pathological deal cannot hold up a round.
+"""
+
+import heapq
+import multiprocessing
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import (ProcessPoolExecutor, TimeoutError,
+                                as_completed)
+
+import numpy as np
+
+OPERATION_NAMES = {'+': "Add", '-': "Subtract", '*': "Multiply", '/': "Divide"}
+
+
+def iter_moves(a, b):
+    """Yield the useful (op, result) moves for a >= b.
+
+    Commutative duplicates (b + a, b * a) and no-op moves (x * 1, x / 1) are
+    skipped, as are moves that leave the positive integers.
+    """
+    yield '+', a + b
+    if a > b:
+        yield '-', a - b
+    if b > 1:
+        yield '*', a * b
+        if a % b == 0:
+            yield '/', a // b
+
+
+def iter_state_moves(state):
+    """Yield (move, next_state) for every distinct move from a sorted state."""
+    n = len(state)
+    for i in range(n - 1):
+        a = state[i]
+        if i and a == state[i - 1]:
+            continue
+        for j in range(i + 1, n):
+            b = state[j]
+            if j > i + 1 and b == state[j - 1]:
+                continue
+            rest = state[:i] + state[i + 1:j] + state[j + 1:]
+            for op, result in iter_moves(a, b):
+                yield (a, op, b, result), tuple(sorted(rest + (result,), reverse=True))
+
+
+def build_steps(numbers, path):
+    """Explain a path of (x, op, y, result) moves in solve_numbers' format.
+
+    Args:
+        numbers (list): The numbers available at the start
+        path (list): Moves in the order they were made
+
+    Returns:
+        list: One dict per move with 'expression', 'description' and
+            'available_numbers' keys.
+    """
+    available = [int(num) for num in numbers]
+    steps = []
+    for x, op, y, result in path:
+        available.remove(x)
+        available.remove(y)
+        available.append(result)
+        steps.append({
+            'expression': f"{x} {op} {y} = {result}",
+            'description': f"{OPERATION_NAMES[op]} {x} and {y} to get {result}.",
+            'available_numbers': available.copy()
+        })
+    return steps
+
+
+class SearchStopped(Exception):
+    """Raised inside a search when its should_stop callback fires."""
+
+
+class NumbersSolver:
+    # How many nodes to explore between should_stop checks.
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, numbers, target, should_stop=None, deadline=None):
+        """Memoised depth-first solver for one numbers round.
+
+        While searching for the target it also tracks the nearest value seen,
+        so an unreachable target still yields the best approximation without
+        a second search.
+
+        Args:
+            numbers (list): Numbers available, each usable once
+            target (int): Value to reach
+            should_stop (callable): Polled every CHECK_INTERVAL nodes; the
+                search gives up when it returns True
+            deadline (float): time.monotonic() value at which the search
+                gives up, checked as often as should_stop
+        """
+        self.numbers = tuple(sorted((int(num) for num in numbers), reverse=True))
+        self.target = int(target)
+        if deadline is not None:
+            should_stop = _deadline_check(deadline, should_stop)
+        self.should_stop = should_stop
+        # States already shown not to reach the target.
+        self.dead_states = set()
+        self.nodes = 0
+        self.stopped = False
+        self.complete = False
+
+        # Nearest value seen so far and the moves making it.
+        self.best_value = None
+        self.best_path = None
+        self.best_distance = float("inf")
+        self._moves = []
+
+    def solve(self):
+        """Return the moves reaching the target, or None if it is unreachable."""
+        for num in self.numbers:
+            self._consider(num, [])
+        if self.best_distance == 0:
+            return []
+        try:
+            path = self._search(self.numbers)
+            self.complete = True
+        except SearchStopped:
+            self.stopped = True
+            path = None
+        if path is not None:
+            self.best_value, self.best_path, self.best_distance = (
+                self.target, path, 0)
+        return path
+
+    def solve_closest(self):
+        """Return (value, moves) for the target or the nearest value to it.
+
+        Ties between values equally far from the target keep the first found.
+        """
+        if self.best_path is None:
+            self.solve()
+        return self.best_value, self.best_path
+
+    @property
+    def proven_optimal(self):
+        """Whether the best value is the target or the search was exhaustive."""
+        return self.best_distance == 0 or self.complete
+
+    def _consider(self, value, path):
+        distance = abs(value - self.target)
+        if distance < self.best_distance:
+            self.best_value, self.best_path, self.best_distance = (
+                value, path, distance)
+
+    def _search(self, state):
+        if state in self.dead_states:
+            return None
+        self.nodes += 1
+        if (self.should_stop is not None
+                and self.nodes % self.CHECK_INTERVAL == 0 and self.should_stop()):
+            raise SearchStopped
+
+        # Same moves as iter_state_moves, inlined as this is the hot loop.
+        n = len(state)
+        for i in range(n - 1):
+            a = state[i]
+            if i and a == state[i - 1]:
+                continue
+            for j in range(i + 1, n):
+                b = state[j]
+                if j > i + 1 and b == state[j - 1]:
+                    continue
+                rest = state[:i] + state[i + 1:j] + state[j + 1:]
+                for op, result in iter_moves(a, b):
+                    move = (a, op, b, result)
+                    if result == self.target:
+                        return [move]
+                    if abs(result - self.target) < self.best_distance:
+                        self._consider(result, self._moves + [move])
+                    if not rest:
+                        continue
+                    self._moves.append(move)
+                    path = self._search(
+                        tuple(sorted(rest + (result,), reverse=True)))
+                    self._moves.pop()
+                    if path is not None:
+                        return [move] + path
+
+        # Every value reachable from a dead state has already been offered to
+        # _consider, so skipping it later cannot miss a closer answer.
+        self.dead_states.add(state)
+        return None
+
+
+def _deadline_check(deadline, should_stop=None):
+    """Return a should_stop callable that is also True once deadline passes."""
+    def check():
+        return time.monotonic() >= deadline or (
+            should_stop is not None and should_stop())
+    return check
+
+
+# Set in each worker process of a SolverPool; tells workers to give up.
+_stop_event = None
+
+# Nodes the sequential search may explore before solve_parallel splits the
+# deal across processes. The hardest six-number deals take about 30,000.
+SEQUENTIAL_NODES = 50000
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _solve_branch(state, target, move):
+    """Worker: search below one first move, returning (value, moves, complete)."""
+    solver = NumbersSolver(state, target, should_stop=_stop_event.is_set)
+    value, path = solver.solve_closest()
+    return value, [move] + path, solver.complete
+
+
+class SolverPool:
+    def __init__(self, workers=None):
+        """Long-lived worker processes for solve_parallel.
+
+        Starting processes costs far more than an ordinary deal takes to
+        solve, so create one pool and pass it to every solve_parallel call.
+        The pool runs one solve at a time: its workers share one stop event.
+
+        Args:
+            workers (int): Processes to use; defaults to the CPU count
+        """
+        self.stop_event = multiprocessing.Event()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(self.stop_event,))
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def solve_parallel(numbers, target, workers=None, deadline=None, pool=None,
+                   sequential_nodes=SEQUENTIAL_NODES):
+    """Solve a hard deal with its first-level moves spread over processes.
+
+    The deal is first searched sequentially for up to sequential_nodes
+    nodes, which settles every ordinary six-number deal. Only if that runs
+    out are the first moves split across worker processes; the first worker
+    to reach the target stops the others. Unreachable targets still return
+    the closest value found across all branches.
+
+    Each branch keeps its own dead states, so a state reachable from several
+    first moves is searched once per branch: on a hard six-number deal the
+    branches explore about four times the nodes of one sequential search.
+    Splitting therefore only pays off for searches that are long compared
+    with that overhead and with handing work to the pool.
+
+    Args:
+        numbers (list): Numbers available, each usable once
+        target (int): Value to reach
+        workers (int): Processes for a temporary pool when none is given
+        deadline (float): time.monotonic() value at which every worker is
+            stopped and the closest value found so far is returned
+        pool (SolverPool): Long-lived workers to use
+        sequential_nodes (int): Sequential search budget before splitting
+
+    Returns:
+        tuple: (value, moves, proven_optimal), where proven_optimal says
+            whether value is the target or every branch was searched.
+    """
+    root = NumbersSolver(numbers, target, deadline=deadline)
+    out_of_time = root.should_stop
+    root.should_stop = lambda: root.nodes >= sequential_nodes or (
+        out_of_time is not None and out_of_time())
+    root.solve_closest()
+    if root.proven_optimal or (
+            deadline is not None and time.monotonic() >= deadline):
+        return root.best_value, root.best_path, root.proven_optimal
+
+    # Seed the best answer with the first moves as well.
+    branches = []
+    for move, state in iter_state_moves(root.numbers):
+        root._consider(move[3], [move])
+        if len(state) > 1:
+            branches.append((state, move))
+    if root.best_distance == 0 or not branches:
+        return root.best_value, root.best_path, True
+
+    own_pool = pool is None
+    if own_pool:
+        pool = SolverPool(workers)
+    complete = True
+    try:
+        with pool.lock:
+            pool.stop_event.clear()
+            futures = [pool.executor.submit(_solve_branch, state, root.target, move)
+                       for state, move in branches]
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    value, path, branch_complete = future.result()
+                    root._consider(value, path)
+                    complete = complete and branch_complete
+                    if root.best_distance == 0:
+                        break
+            except TimeoutError:
+                complete = False
+            # Cancel the branches not started yet; running workers see the
+            # event within CHECK_INTERVAL nodes and return their best so far,
+            # leaving the pool idle for the next solve.
+            pool.stop_event.set()
+            for future in futures:
+                future.cancel()
+            for future in futures:
+                if not future.cancelled():
+                    value, path, _ = future.result()
+                    root._consider(value, path)
+    finally:
+        if own_pool:
+            pool.close()
+    return root.best_value, root.best_path, root.best_distance == 0 or complete
+
+
+# Expression elements used when enumerating solutions are tuples of
+# (key, value, moves, kind, positive_terms, negative_terms). Sums and
+# differences are flattened into "add" nodes and products and quotients into
+# "mul" nodes whose terms are sorted by key, so the key is the same for every
+# ordering and bracketing of the same expression.
+_SEPARATORS = {'add': ('+', '-'), 'mul': ('*', '/')}
+
+
+def _leaf(num):
+    return (str(num), num, (), None, (), ())
+
+
+def _combine(x, op, y, result):
+    """Return the element for x op y, or None if terms cancel out."""
+    kind = 'add' if op in '+-' else 'mul'
+    x_pos, x_neg = (x[4], x[5]) if x[3] == kind else ((x,), ())
+    y_pos, y_neg = (y[4], y[5]) if y[3] == kind else ((y,), ())
+    if op in '+*':
+        pos, neg = x_pos + y_pos, x_neg + y_neg
+    else:
+        pos, neg = x_pos + y_neg, x_neg + y_pos
+    # Adding and taking away the same thing is never an elegant solution.
+    if neg and {term[0] for term in pos} & {term[0] for term in neg}:
+        return None
+    pos, neg = tuple(sorted(pos)), tuple(sorted(neg))
+    sep_pos, sep_neg = _SEPARATORS[kind]
+    key = "(" + sep_pos.join(term[0] for term in pos)
+    if neg:
+        key += sep_neg + sep_neg.join(term[0] for term in neg)
+    key += ")"
+    moves = x[2] + y[2] + ((x[1], op, y[1], result),)
+    return (key, result, moves, kind, pos, neg)
+
+
+def iter_solutions(numbers, target, max_steps=None):
+    """Yield the moves of every distinct solution, as they are found.
+
+    Each state (multiset of expressions) is expanded once, and a solution
+    is only yielded the first time its canonical form is seen.
+
+    Args:
+        numbers (list): Numbers available, each usable once
+        target (int): Value to reach
+        max_steps (int): Only search solutions of at most this many moves;
+            None searches them all
+
+    Yields:
+        tuple: (x, op, y, result) moves building the target.
+    """
+    target = int(target)
+    leaves = tuple(sorted(_leaf(int(num)) for num in numbers))
+    if any(leaf[1] == target for leaf in leaves):
+        yield ()
+
+    if max_steps is None:
+        max_steps = len(leaves) - 1
+    found = set()
+    visited = set()
+    stack = [leaves] if max_steps > 0 else []
+    while stack:
+        state = stack.pop()
+        n = len(state)
+        # Moves made so far, counting the one about to be made.
+        steps = len(leaves) - n + 1
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                x, y = state[i], state[j]
+                # Pairs of identical expressions give identical children.
+                if j > i + 1 and y[0] == state[j - 1][0]:
+                    continue
+                if x[1] == target or y[1] == target:
+                    continue
+                if x[1] < y[1]:
+                    x, y = y, x
+                rest = state[:i] + state[i + 1:j] + state[j + 1:]
+                for op, result in iter_moves(x[1], y[1]):
+                    element = _combine(x, op, y, result)
+                    if element is None:
+                        continue
+                    if result == target:
+                        if element[0] not in found:
+                            found.add(element[0])
+                            yield element[2]
+                        continue
+                    if not rest or steps == max_steps:
+                        continue
+                    child = tuple(sorted(rest + (element,)))
+                    child_key = tuple(item[0] for item in child)
+                    if child_key not in visited:
+                        visited.add(child_key)
+                        stack.append(child)
+
+
+def simplicity_key(moves):
+    """Rank a solution: fewer steps, then smaller intermediate values.
+
+    Every move combines two values into one, so a solution of n steps
+    always uses n + 1 numbers; counting numbers used would never change the
+    order and is left out.
+    """
+    largest = max((move[3] for move in moves), default=0)
+    return len(moves), largest
+
+
+def best_solutions(numbers, target, k=3):
+    """Return the k simplest distinct solutions, simplest first.
+
+    Simplest means fewest steps first, so the search deepens one step at a
+    time and stops at the first depth with k solutions: every solution with
+    more steps would rank below them. A ReachableTable gives the fewest
+    steps possible, so deepening starts there and an unreachable target is
+    answered without searching. Each depth streams through a heap bounded
+    at k, so memory does not grow with the number of solutions.
+    """
+    table = ReachableTable(numbers)
+    if not table.is_solvable(target):
+        return []
+    heap = []
+    for max_steps in range(table.n_steps(target), len(numbers)):
+        heap = []
+        for count, moves in enumerate(iter_solutions(numbers, target,
+                                                     max_steps=max_steps)):
+            # Max-heap on simplicity via negated keys; count breaks ties.
+            entry = (tuple(-part for part in simplicity_key(moves)), -count,
+                     moves)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        if len(heap) >= k:
+            break
+    return [moves for _, _, moves in sorted(heap, reverse=True)]
+
+
+class ReachableTable:
+    def __init__(self, numbers):
+        """Every value reachable from numbers, with a shortest expression each.
+
+        Values are built up over subsets of the numbers: a subset's values
+        come from combining the values of each split into two disjoint
+        halves. Subsets with the same multiset of numbers are only computed
+        once.
+
+        Args:
+            numbers (list): Numbers available, each usable once
+        """
+        self.numbers = [int(num) for num in numbers]
+        n = len(self.numbers)
+
+        # values[mask] maps value -> None for a single number, or
+        # (op, left_mask, left_value, right_mask, right_value).
+        self.values = [None] * (1 << n)
+        computed = {}
+        for mask in sorted(range(1, 1 << n), key=lambda m: bin(m).count("1")):
+            members = tuple(sorted(self.numbers[k] for k in range(n)
+                                    if mask >> k & 1))
+            if members in computed:
+                self.values[mask] = computed[members]
+                continue
+            if len(members) == 1:
+                made = {members[0]: None}
+            else:
+                made = self._combine(mask)
+            computed[members] = made
+            self.values[mask] = made
+
+        # Shortest expression for each value: the smallest subset making it.
+        self.best_masks = {}
+        for mask in sorted(range(1, 1 << n), key=lambda m: bin(m).count("1")):
+            for value in self.values[mask]:
+                self.best_masks.setdefault(value, mask)
+        self.sorted_values = sorted(self.best_masks)
+
+    def _combine(self, mask):
+        made = {}
+        low_bit = mask & -mask
+        sub = (mask - 1) & mask
+        while sub:
+            # Only visit each unordered split once: the half holding the
+            # lowest bit is always `sub`.
+            if sub & low_bit:
+                other = mask ^ sub
+                left_values = self.values[sub]
+                right_values = self.values[other]
+                for a in left_values:
+                    for b in right_values:
+                        if a >= b:
+                            x, x_mask, y, y_mask = a, sub, b, other
+                        else:
+                            x, x_mask, y, y_mask = b, other, a, sub
+                        for op, result in iter_moves(x, y):
+                            if result not in made:
+                                made[result] = (op, x_mask, x, y_mask, y)
+            sub = (sub - 1) & mask
+        return made
+
+    def is_solvable(self, target):
+        """Return whether target can be made exactly."""
+        return int(target) in self.best_masks
+
+    def closest(self, target):
+        """Return the reachable value nearest to target (the lower on a tie)."""
+        target = int(target)
+        idx = bisect_left(self.sorted_values, target)
+        candidates = self.sorted_values[max(idx - 1, 0):idx + 1]
+        return min(candidates, key=lambda value: (abs(value - target), value))
+
+    def n_steps(self, value):
+        """Return the fewest operations needed to make value."""
+        return bin(self.best_masks[int(value)]).count("1") - 1
+
+    def path(self, value):
+        """Return the moves of a shortest expression for value, or None."""
+        value = int(value)
+        if value not in self.best_masks:
+            return None
+
+        def walk(mask, value):
+            pointer = self.values[mask][value]
+            if pointer is None:
+                return []
+            op, x_mask, x, y_mask, y = pointer
+            return walk(x_mask, x) + walk(y_mask, y) + [(x, op, y, value)]
+
+        return walk(self.best_masks[value], value)
+
+    def expression(self, value):
+        """Return a shortest expression for value as one string, or None.
+
+        E.g. "(100 + 3) * 6"; every operation but the last is bracketed.
+        """
+        value = int(value)
+        if value not in self.best_masks:
+            return None
+
+        def walk(mask, value):
+            pointer = self.values[mask][value]
+            if pointer is None:
+                return str(value)
+            op, x_mask, x, y_mask, y = pointer
+            return f"({walk(x_mask, x)} {op} {walk(y_mask, y)})"
+
+        expression = walk(self.best_masks[value], value)
+        return expression[1:-1] if expression.startswith("(") else expression
+
+    def solution(self, value):
+        """Return solve_numbers-style steps for a shortest route to value."""
+        path = self.path(value)
+        return None if path is None else build_steps(self.numbers, path)
+
+    def target_table(self, low=100, high=999):
+        """Summarise every target in [low, high] at once.
+
+        Returns:
+            tuple: (targets, closest, n_steps) arrays, where closest holds
+                the nearest reachable value to each target and n_steps the
+                operations needed to make it.
+        """
+        targets = np.arange(low, high + 1)
+        values = np.array(self.sorted_values)
+        idx = np.searchsorted(values, targets)
+        below = values[np.clip(idx - 1, 0, len(values) - 1)]
+        above = values[np.clip(idx, 0, len(values) - 1)]
+        closest = np.where(np.abs(above - targets) < np.abs(below - targets),
+                            above, below)
+        n_steps = np.array([self.n_steps(value) for value in closest])
+        return targets, closest, n_steps
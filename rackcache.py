@@ -0,0 +1,81 @@
+"""Per-rack results shared by everything that asks about the same letters.
+
+In one letters round both players' guesses, dictionary corner and answer
+checking all need the words a rack allows. A RackResult holds them once -
+ranked longest first, as a length histogram and as a set for membership -
+and a RackCache keeps recent results, keyed on the sorted rack, with LRU
+eviction across rounds.
+"""
+
+import threading
+from collections import Counter, OrderedDict
+
+import instrumentation
+from wordindex import letter_signature
+
+
+def rack_key(store, letters, min_length, solver=None):
+    """Cache key for a rack: letter order does not matter.
+
+    The store is keyed by its store_id rather than id(), as custom stores
+    can be evicted (see lettersgame._CUSTOM_STORES) and ids recycled.
+    """
+    return (store.store_id, letter_signature("".join(letters)), min_length,
+            solver)
+
+
+class RackResult:
+    def __init__(self, words):
+        """Every valid word for one rack, in the forms callers need.
+
+        Args:
+            words (iterable): The rack's valid words, in any order
+        """
+        self.ranked_words = sorted(words, key=lambda word: (-len(word), word))
+        self.words = frozenset(self.ranked_words)
+        self.histogram = dict(Counter(len(word) for word in self.ranked_words))
+
+    def __len__(self):
+        return len(self.ranked_words)
+
+
+class RackCache:
+    def __init__(self, maxsize=256):
+        """LRU cache of RackResults.
+
+        Args:
+            maxsize (int): Most racks to keep; 0 disables caching
+        """
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached RackResult for key, or None."""
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+        instrumentation.count("rackcache.hits" if result is not None
+                              else "rackcache.misses")
+        return result
+
+    def put(self, key, result):
+        """Store result under key, evicting the least recently used racks."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+    def __contains__(self, key):
+        return key in self._results
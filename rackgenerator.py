@@ -0,0 +1,70 @@
+"""Letters-round racks with quality guarantees.
+
+Blindly sampled racks sometimes allow no long words at all. RackGenerator
+scores each candidate rack with one pass over its sub-multisets in the
+anagram index, and rejects racks that miss the requested constraints, e.g.
+"the best word has at least seven letters and there are at least three
+valid words".
+"""
+
+import random
+
+from letterdeck import LetterDeck
+from wordindex import WordIndex
+from wordstore import get_word_store
+
+
+class RackGenerator:
+    def __init__(self, solver=None, deck=None, min_word_length=4):
+        """Rejection-sampling rack generator.
+
+        Args:
+            solver: Word solver with length_histogram; defaults to the
+                shared store's WordIndex
+            deck (LetterDeck): Where letters are drawn from
+            min_word_length (int): Shortest word that counts as valid
+        """
+        self.solver = solver if solver is not None else (
+                        get_word_store().get_solver(WordIndex))
+        self.deck = deck if deck is not None else LetterDeck(power=0.5)
+        self.min_word_length = min_word_length
+
+    def rack_quality(self, letters):
+        """Return (longest valid word length, number of valid words)."""
+        histogram = self.solver.length_histogram(
+                        letters, min_length=self.min_word_length)
+        if not histogram:
+            return 0, 0
+        return max(histogram), sum(histogram.values())
+
+    def meets(self, letters, min_best_length=7, min_words=3):
+        """Return whether a rack satisfies the constraints."""
+        best_length, n_words = self.rack_quality(letters)
+        return best_length >= min_best_length and n_words >= min_words
+
+    def generate(self, min_best_length=7, min_words=3, n_letters=9,
+                    vowel_range=(3, 5), max_tries=10000):
+        """Generate one rack meeting the constraints.
+
+        Args:
+            min_best_length (int): The longest valid word must be this long
+            min_words (int): At least this many valid words
+            n_letters (int): Rack size
+            vowel_range (tuple): Inclusive bounds on the number of vowels
+            max_tries (int): Candidate racks to try before giving up
+
+        Returns:
+            list: The letters, in random order.
+        """
+        for _ in range(max_tries):
+            n_vowels = random.randint(*vowel_range)
+            letters = self.deck.generate_letters_by_choice(
+                            n_vowels, n_letters - n_vowels)
+            if self.meets(letters, min_best_length, min_words):
+                return letters
+        raise ValueError(f"No rack with a {min_best_length}-letter word and "
+                         f"{min_words} words found in {max_tries} tries.")
+
+    def generate_many(self, n_racks, **constraints):
+        """Generate n_racks racks, each meeting the constraints of generate."""
+        return [self.generate(**constraints) for _ in range(n_racks)]
@@ -0,0 +1,229 @@
+"""Benchmarks for the letters, numbers and conundrum hot paths.
+
+Every input is generated from a fixed seed (both `random` and NumPy), so two
+runs on the same machine time the same work. For each benchmark the p50/p99
+latency of a single call and the peak traced memory are reported, and the
+whole run is saved as JSON to compare against later runs or other solvers:
+
+    python run_benchmarks.py --racks 200 --deals 50 --output results.json
+    python run_benchmarks.py --solvers index,trie --engines memo,dfs
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from conundrumgame import ConundrumGame
+from letterdeck import LetterDeck
+import lettersgame
+from lettersgame import LettersGame
+from numbersgame import NumbersGame
+from numbersolver import ReachableTable
+from wordstore import get_word_store
+
+
+def summarise(name, latencies, peak_bytes, **extra):
+    """Collect the statistics for one benchmark as a JSON-ready dict."""
+    latencies = np.asarray(latencies)
+    result = {
+        "name": name,
+        "n_calls": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "mean_ms": float(latencies.mean() * 1000),
+        "total_s": float(latencies.sum()),
+        "peak_memory_kb": peak_bytes / 1024,
+    }
+    result.update(extra)
+    return result
+
+
+def measure(name, func, inputs, **extra):
+    """Time func(x) for every x, then trace the peak memory of the same calls.
+
+    Timing and memory tracing are separate passes so tracemalloc's overhead
+    does not distort the latencies. Output printed by func is discarded.
+    """
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for x in inputs:
+            start = time.perf_counter()
+            func(x)
+            latencies.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        for x in inputs:
+            func(x)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    result = summarise(name, latencies, peak, **extra)
+    print(f"{name:<45} p50 {result['p50_ms']:9.3f} ms   "
+          f"p99 {result['p99_ms']:9.3f} ms   peak {result['peak_memory_kb']:10.1f} KB")
+    return result
+
+
+def make_racks(n_racks, seed):
+    """Seeded nine-letter racks with 3-5 vowels, as players tend to pick."""
+    random.seed(seed)
+    deck = LetterDeck(power=0.5)
+    racks = []
+    for _ in range(n_racks):
+        n_vowels = random.randint(3, 5)
+        racks.append(deck.generate_letters_by_choice(n_vowels, 9 - n_vowels))
+    return racks
+
+
+def make_deals(n_deals, seed, n_large=None):
+    """Seeded (numbers, solvable target, unsolvable target or None) deals."""
+    rng = np.random.default_rng(seed)
+    game = NumbersGame(numbers=[], target=100)
+    game.rng = rng
+    deals = []
+    for _ in range(n_deals):
+        large = rng.integers(0, 5) if n_large is None else n_large
+        numbers = [int(num) for num in game.generate_number_set(n_large=large)]
+        table = ReachableTable(numbers)
+        targets = np.arange(100, 1000)
+        solvable = np.array([table.is_solvable(target) for target in targets])
+        easy = int(rng.choice(targets[solvable])) if solvable.any() else None
+        hard = int(rng.choice(targets[~solvable])) if (~solvable).any() else None
+        deals.append((numbers, easy, hard))
+    return deals
+
+
+def bench_letters(racks, solvers, seed):
+    results = []
+    for solver in solvers:
+        game = LettersGame(letters=racks[0], solver=solver)
+        game.rng = np.random.default_rng(seed)
+        start = time.perf_counter()
+        game.get_solver()
+        results.append({"name": f"letters[{solver}] solver build",
+                        "seconds": time.perf_counter() - start})
+        print(f"{results[-1]['name']:<45} {results[-1]['seconds']:.3f} s")
+
+        def set_rack(letters):
+            game.letters = letters
+            return game
+
+        results.append(measure(f"letters[{solver}] get_valid_words",
+                               lambda letters: set_rack(letters).get_valid_words(),
+                               racks, solver=solver))
+        # Guessing needs at least one valid word on the rack.
+        playable = [letters for letters in racks
+                    if set_rack(letters).word_length_histogram()]
+        results.append(measure(f"letters[{solver}] generate_human_guess",
+                               lambda letters: set_rack(letters).generate_human_guess(),
+                               playable, solver=solver))
+        results.append(measure(f"letters[{solver}] dictionary_corner",
+                               lambda letters: set_rack(letters).dictionary_corner(),
+                               racks, solver=solver))
+    return results
+
+
+def bench_numbers(deals, engines, label):
+    results = []
+    game = NumbersGame(numbers=[], target=100)
+
+    def solve(numbers, target, engine):
+        game.numbers, game.target = numbers, target
+        if engine == "table":
+            table = ReachableTable(numbers)
+            return table.solution(table.closest(target))
+        return game.solve_numbers(explain=False, engine=engine)
+
+    for engine in engines:
+        for kind, column in (("solvable", 1), ("unsolvable", 2)):
+            cases = [(deal[0], deal[column]) for deal in deals
+                     if deal[column] is not None]
+            if not cases:
+                continue
+            results.append(measure(
+                f"numbers[{engine}] {label} {kind}",
+                lambda case: solve(case[0], case[1], engine),
+                cases, engine=engine))
+    return results
+
+
+def bench_conundrum(n_games, seed):
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    ConundrumGame(rng=np.random.default_rng(seed))  # Warm the shared word list.
+    return [measure("ConundrumGame()", lambda _: ConundrumGame(rng=rng),
+                    range(n_games))]
+
+
+def bench_letterdeck(n_racks, seed):
+    random.seed(seed)
+    deck = LetterDeck(power=0.5)
+    single = measure("LetterDeck.generate_letters",
+                     lambda _: deck.generate_letters(), range(n_racks))
+    single["racks_per_second"] = 1000 / single["mean_ms"]
+
+    rng = np.random.default_rng(seed)
+    bulk = measure(f"LetterDeck.generate_many({n_racks})",
+                   lambda _: deck.generate_many(n_racks, rng=rng), range(5))
+    bulk["racks_per_second"] = n_racks * 1000 / bulk["mean_ms"]
+    return [single, bulk]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--racks", type=int, default=100,
+                        help="letter racks per letters benchmark")
+    parser.add_argument("--deals", type=int, default=30,
+                        help="number deals per numbers benchmark")
+    parser.add_argument("--conundrums", type=int, default=100)
+    parser.add_argument("--solvers", default="index,matrix,trie",
+                        help="comma-separated LettersGame solvers")
+    parser.add_argument("--engines", default="memo,table",
+                        help="comma-separated numbers engines: memo, dfs, table")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--rack-cache", action="store_true",
+                        help="keep the per-rack cache on, so repeated racks "
+                             "time cache lookups rather than solves")
+    args = parser.parse_args()
+
+    if not args.rack_cache:
+        lettersgame.RACK_CACHE.maxsize = 0
+
+    start = time.perf_counter()
+    get_word_store()
+    load_seconds = time.perf_counter() - start
+    print(f"{'word store load':<45} {load_seconds:.3f} s")
+
+    engines = args.engines.split(",")
+    results = [{"name": "word store load", "seconds": load_seconds}]
+    results += bench_letters(make_racks(args.racks, args.seed),
+                             args.solvers.split(","), args.seed)
+    results += bench_numbers(make_deals(args.deals, args.seed), engines, "mixed")
+    results += bench_numbers(make_deals(args.deals, args.seed, n_large=4),
+                             engines, "4-large")
+    results += bench_conundrum(args.conundrums, args.seed)
+    results += bench_letterdeck(args.racks, args.seed)
+
+    report = {
+        "seed": args.seed,
+        "args": vars(args),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
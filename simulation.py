@@ -0,0 +1,196 @@
+"""Monte Carlo matches between AI players, for calibrating skill levels.
+
+Each match plays the GameSession round sequence without I/O or timers:
+    - each letters rack is picked as an AI chooser picks it in a session,
+      one vowel or consonant at a time,
+    - each letters rack is solved once and both players guess from the same
+      ranked word list,
+    - each numbers deal is solved once and both players guess around the
+      closest reachable value,
+    - the conundrum goes to the faster of the players who solve it.
+Points come from LettersGame.determine_point_dividend and
+NumbersGame.lookup_points_awarded, as in a real match.
+
+Matches are seeded from one SeedSequence, so a run is reproducible however
+many worker processes share it:
+
+    python simulation.py --matches 2000 --skills 0.5,0.9 --workers 4
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gamesession import (CONUNDRUM_POINTS, ROUNDS, ai_letter_type,
+                         pick_rack_letter)
+from letterdeck import LetterDeck
+from lettersgame import LettersGame
+from numbersgame import NumbersGame
+from numbersolver import NumbersSolver
+
+# Chance of each number of large numbers (0-4) being chosen.
+LARGE_NUMBER_ODDS = [0.1, 0.4, 0.4, 0.05, 0.05]
+
+
+def pick_rack(deck, rng, n_letters=9):
+    """Pick a rack as GameSession does for an AI player choosing letters."""
+    letters, counts = [], {}
+    while len(letters) < n_letters:
+        letter = pick_rack_letter(deck, ai_letter_type(letters, rng), counts,
+                                  rng)
+        letters.append(letter)
+        counts[letter] = counts.get(letter, 0) + 1
+    return letters
+
+
+def play_letters_round(letters, skill_levels, rng, min_word_length=4):
+    """Return each player's points for one rack, solving it once."""
+    game = LettersGame(letters=list(letters), min_word_length=min_word_length)
+    game.rng = rng
+    ranked_words = game.ranked_words()
+    if not ranked_words:
+        return 0, 0
+    guesses = [game.generate_human_guess(skill_level=skill,
+                                         ranked_words=ranked_words)
+               for skill in skill_levels]
+    return game.determine_point_dividend(*guesses)
+
+
+def play_numbers_round(skill_levels, rng):
+    """Return each player's points for one random deal, solving it once."""
+    game = NumbersGame(numbers=[], target=100)
+    game.rng = rng
+    n_large = rng.choice(len(LARGE_NUMBER_ODDS), p=LARGE_NUMBER_ODDS)
+    game.numbers = [int(num) for num in game.generate_number_set(n_large)]
+    game.target = int(game.generate_target())
+    closest, _ = NumbersSolver(game.numbers, game.target).solve_closest()
+    return tuple(game.lookup_points_awarded(
+                    game.generate_human_guess(skill_level=skill,
+                                              reference=closest))
+                 for skill in skill_levels)
+
+
+def play_conundrum_round(skill_levels, rng):
+    """Return each player's points: the faster of those who solve it wins."""
+    skill_levels = np.asarray(skill_levels)
+    solved = rng.random(len(skill_levels)) < skill_levels
+    points = [0] * len(skill_levels)
+    if solved.any():
+        # Better players tend to answer sooner.
+        times = rng.random(len(skill_levels)) * (1 - skill_levels)
+        times[~solved] = np.inf
+        points[int(np.argmin(times))] = CONUNDRUM_POINTS
+    return tuple(points)
+
+
+def simulate_match(seed, skill_levels, rounds=ROUNDS, min_word_length=4):
+    """Play one match between AI players.
+
+    Args:
+        seed (np.random.SeedSequence, int): Seed for the whole match
+        skill_levels (tuple): Each player's skill level, 0-1
+        rounds (tuple): Round sequence, as gamesession.ROUNDS
+
+    Returns:
+        np.ndarray: (n_rounds, n_players) points per round.
+    """
+    rng = np.random.default_rng(seed)
+    deck = LetterDeck(power=0.5)
+
+    points = []
+    for kind, _ in rounds:
+        if kind == "letters":
+            points.append(play_letters_round(pick_rack(deck, rng), skill_levels,
+                                             rng, min_word_length))
+        elif kind == "numbers":
+            points.append(play_numbers_round(skill_levels, rng))
+        elif kind == "conundrum":
+            points.append(play_conundrum_round(skill_levels, rng))
+        else:
+            raise ValueError(f"Unknown round: {kind}")
+    return np.array(points, dtype=int)
+
+
+def simulate(n_matches, skill_levels=(0.5, 0.9), seed=None, workers=None,
+                rounds=ROUNDS, min_word_length=4):
+    """Play n_matches seeded matches, spread over a process pool.
+
+    Args:
+        n_matches (int): Matches to play
+        skill_levels (tuple): Each player's skill level, 0-1
+        seed (int): Root seed; each match gets its own spawned child
+        workers (int): Processes to use; 0 plays every match in this
+            process, None uses the CPU count
+
+    Returns:
+        np.ndarray: (n_matches, n_rounds, n_players) points per round.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(n_matches)
+    args = (skill_levels, rounds, min_word_length)
+    if workers == 0:
+        results = [simulate_match(match_seed, *args) for match_seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                simulate_match, seeds, *([arg] * n_matches for arg in args),
+                chunksize=max(1, n_matches // 64)))
+    return np.array(results)
+
+
+def summarise(points, rounds=ROUNDS):
+    """Return score distributions for simulated matches.
+
+    Args:
+        points (np.ndarray): As returned by simulate
+
+    Returns:
+        dict: Per player mean and percentiles of the final score, mean
+            points per round type, and the share of matches won and drawn.
+    """
+    totals = points.sum(axis=1)
+    kinds = np.array([kind for kind, _ in rounds])
+    players = []
+    for player in range(totals.shape[1]):
+        others = np.delete(totals, player, axis=1).max(axis=1)
+        players.append({
+            "mean": float(totals[:, player].mean()),
+            "std": float(totals[:, player].std()),
+            "percentiles": {q: float(np.percentile(totals[:, player], q))
+                            for q in (5, 25, 50, 75, 95)},
+            "round_means": {kind: float(points[:, kinds == kind, player]
+                                        .sum(axis=1).mean())
+                            for kind in dict.fromkeys(kinds)},
+            "win_rate": float((totals[:, player] > others).mean()),
+        })
+    draws = (totals == totals.max(axis=1, keepdims=True)).sum(axis=1) > 1
+    return {"n_matches": len(points), "players": players,
+            "draw_rate": float(draws.mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--skills", default="0.5,0.9",
+                        help="comma-separated skill levels, one per player")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes to use; 0 runs in this process")
+    args = parser.parse_args()
+
+    skill_levels = tuple(float(skill) for skill in args.skills.split(","))
+    summary = summarise(simulate(args.matches, skill_levels, seed=args.seed,
+                                 workers=args.workers))
+    print(f"{summary['n_matches']} matches, {summary['draw_rate']:.1%} drawn")
+    for skill, player in zip(skill_levels, summary["players"]):
+        percentiles = ", ".join(f"p{q} {value:.0f}"
+                                for q, value in player["percentiles"].items())
+        rounds = ", ".join(f"{kind} {mean:.1f}"
+                           for kind, mean in player["round_means"].items())
+        print(f"Skill {skill:.2f}: won {player['win_rate']:.1%}, "
+              f"mean {player['mean']:.1f} +/- {player['std']:.1f} ({percentiles})")
+        print(f"    mean points per match by round type: {rounds}")
+
+
+if __name__ == "__main__":
+    main()
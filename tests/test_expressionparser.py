@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from expressionparser import (MAX_DEPTH, MAX_EXPRESSION_LENGTH, MAX_VALUE,
+                              ExpressionError, evaluate, evaluate_batch,
+                              tokenize)
+
+NUMBERS = [100, 75, 50, 25, 6, 3]
+
+
+@pytest.mark.parametrize("expression, value", [
+    ("(100 + 6) x 3 - 75 / 25", 315),
+    ("100 * 6 + 50", 650),
+    ("75 ÷ 25 × 3", 9),
+    ("100 − 6", 94),
+    ("  25  ", 25),
+])
+def test_evaluate(expression, value):
+    assert evaluate(expression, NUMBERS) == value
+
+
+def test_numbers_not_checked_without_numbers():
+    assert evaluate("7 x 7") == 49
+
+
+def test_overused_number():
+    with pytest.raises(ExpressionError, match="not available"):
+        evaluate("25 + 25", NUMBERS)
+    assert evaluate("25 + 25", [25, 25]) == 50
+
+
+def test_number_not_dealt():
+    with pytest.raises(ExpressionError, match="not available"):
+        evaluate("100 + 7", NUMBERS)
+
+
+def test_non_integer_division():
+    with pytest.raises(ExpressionError, match="whole number"):
+        evaluate("100 / 3", NUMBERS)
+
+
+def test_division_by_zero():
+    with pytest.raises(ExpressionError):
+        evaluate("100 / (6 - 6)")
+
+
+def test_non_positive_subtraction():
+    with pytest.raises(ExpressionError, match="positive"):
+        evaluate("25 - 75", NUMBERS)
+
+
+def test_depth_cap():
+    nested = "(" * MAX_DEPTH + "3" + ")" * MAX_DEPTH
+    assert evaluate(nested) == 3
+    too_deep = "(" * (MAX_DEPTH + 1) + "3" + ")" * (MAX_DEPTH + 1)
+    with pytest.raises(ExpressionError, match="nested"):
+        evaluate(too_deep)
+
+
+def test_length_cap():
+    with pytest.raises(ExpressionError, match="longer"):
+        evaluate("1" + " + 1" * MAX_EXPRESSION_LENGTH)
+
+
+def test_number_size_cap():
+    with pytest.raises(ExpressionError, match="too large"):
+        evaluate("10000 + 1")
+
+
+def test_value_cap():
+    big = int(MAX_VALUE ** (1 / 4)) + 1
+    with pytest.raises(ExpressionError, match="too large"):
+        evaluate(" x ".join([str(big)] * 4))
+
+
+@pytest.mark.parametrize("expression", [
+    "", "   ", "3 +", "(3 + 4", "3 + 4)", "3 4", "3 ^ 2", "٣ + 4", "eval(1)",
+])
+def test_malformed(expression):
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", [None, 3, b"3 + 4"])
+def test_non_string(expression):
+    with pytest.raises(ExpressionError):
+        evaluate(expression)
+
+
+def test_tokenize():
+    assert tokenize("(25 - 5) x 7") == ["(", 25, "-", 5, ")", "*", 7]
+
+
+def test_evaluate_batch():
+    expressions = ["100 + 6", "25 + 25", "100 + 6", "100 / 3", "3 x 6"]
+    values, errors = evaluate_batch(expressions, NUMBERS)
+    assert values.dtype == np.int64
+    assert values.tolist() == [106, -1, 106, -1, 18]
+    assert errors[0] is None and errors[2] is None and errors[4] is None
+    assert "not available" in errors[1]
+    assert "whole number" in errors[3]
+
+
+def test_evaluate_batch_empty():
+    values, errors = evaluate_batch([], NUMBERS)
+    assert len(values) == 0 and errors == []
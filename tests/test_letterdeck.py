@@ -0,0 +1,71 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from letterdeck import LetterDeck, _AliasTable
+
+
+def brute_force_occurrence(draws):
+    occurrence = np.zeros_like(draws)
+    for row in range(draws.shape[0]):
+        seen = Counter()
+        for column, letter in enumerate(draws[row]):
+            seen[letter] += 1
+            occurrence[row, column] = seen[letter]
+    return occurrence
+
+
+@pytest.mark.parametrize("n_letters", [1, 3, 26])
+def test_occurrence(n_letters):
+    draws = np.random.default_rng(0).integers(0, n_letters, size=(200, 18))
+    assert (LetterDeck._occurrence(draws) == brute_force_occurrence(draws)).all()
+
+
+def test_alias_table_matches_weights():
+    weights = {"A": 0.5, "B": 0.3, "C": 0.15, "D": 0.05}
+    table = _AliasTable(weights)
+    draws = table.sample_indices(np.random.default_rng(1), 200000)
+    frequencies = np.bincount(draws, minlength=4) / len(draws)
+    assert np.allclose(frequencies, list(weights.values()), atol=0.005)
+
+
+def test_alias_table_sample_with_rng_is_reproducible():
+    table = _AliasTable({"A": 1, "B": 2, "C": 3})
+    first = [table.sample(np.random.default_rng(7)) for _ in range(3)]
+    second = [table.sample(np.random.default_rng(7)) for _ in range(3)]
+    assert first == second
+
+
+def test_generate_many():
+    deck = LetterDeck()
+    racks = deck.generate_many(20000, rng=np.random.default_rng(2))
+    assert racks.shape == (20000, 9)
+    assert all(max(Counter(rack).values()) <= deck.MAX_PER_LETTER
+               for rack in racks[:2000])
+    # Letters are drawn from the overall distribution.
+    letters, counts = np.unique(racks, return_counts=True)
+    expected = np.array([deck.normalized_frequencies[letter]
+                         for letter in letters])
+    assert np.allclose(counts / counts.sum(), expected, atol=0.01)
+
+
+def test_generate_many_spans_chunks():
+    deck = LetterDeck()
+    deck.CHUNK_SIZE = 7
+    racks = deck.generate_many(50, n=5, rng=np.random.default_rng(3))
+    assert racks.shape == (50, 5)
+    assert len({"".join(rack) for rack in racks}) > 1
+
+
+def test_picks_respect_limits():
+    deck = LetterDeck()
+    rng = np.random.default_rng(4)
+    counts = {}
+    for _ in range(10):
+        letter = deck.pick_vowel(counts, rng)
+        assert letter in deck.VOWELS
+        counts[letter] = counts.get(letter, 0) + 1
+    assert max(counts.values()) == deck.MAX_PER_LETTER
+    with pytest.raises(ValueError):
+        deck.pick_vowel(counts, rng)
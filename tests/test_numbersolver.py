@@ -0,0 +1,86 @@
+from itertools import combinations
+
+import pytest
+
+from expressionparser import evaluate
+from numbersolver import (NumbersSolver, ReachableTable, best_solutions,
+                          iter_moves, iter_solutions, simplicity_key)
+
+
+def brute_force_values(numbers):
+    """Every value reachable from numbers, by exhaustive search."""
+    values = set(numbers)
+    if len(numbers) < 2:
+        return values
+    for i, j in combinations(range(len(numbers)), 2):
+        x, y = max(numbers[i], numbers[j]), min(numbers[i], numbers[j])
+        rest = [num for k, num in enumerate(numbers) if k not in (i, j)]
+        for _, result in iter_moves(x, y):
+            values |= brute_force_values(rest + [result])
+    return values
+
+
+def replay(numbers, moves):
+    """Check moves only use available values and return the final one."""
+    available = list(numbers)
+    for x, op, y, result in moves:
+        available.remove(x)
+        available.remove(y)
+        assert evaluate(f"{x} {op} {y}") == result
+        available.append(result)
+    return moves[-1][3] if moves else None
+
+
+@pytest.mark.parametrize("numbers", [[3], [2, 2], [1, 2, 3], [4, 6, 7, 25],
+                                     [1, 1, 10, 50]])
+def test_reachable_table(numbers):
+    table = ReachableTable(numbers)
+    assert set(table.sorted_values) == brute_force_values(numbers)
+    for value in table.sorted_values:
+        assert table.is_solvable(value)
+        moves = table.path(value)
+        assert moves == [] or replay(numbers, moves) == value
+        assert len(moves) == table.n_steps(value)
+        assert evaluate(table.expression(value), numbers) == value
+    assert not table.is_solvable(max(table.sorted_values) + 1)
+    assert table.path(-1) is None and table.expression(-1) is None
+
+
+def test_reachable_table_closest():
+    table = ReachableTable([4, 6])
+    # Reachable: 2, 4, 6, 10, 24.
+    assert table.closest(23) == 24
+    assert table.closest(8) == 6  # 6 and 10 tie; the lower wins
+    assert table.closest(1) == 2
+
+
+@pytest.mark.parametrize("numbers, target", [([4, 6, 7, 25], 150),
+                                             ([1, 2, 3, 4], 24),
+                                             ([5, 10], 3)])
+def test_solver_agrees_with_table(numbers, target):
+    table = ReachableTable(numbers)
+    value, moves = NumbersSolver(numbers, target).solve_closest()
+    assert abs(value - target) == abs(table.closest(target) - target)
+    assert moves == [] or replay(numbers, moves) == value
+
+
+def test_best_solutions_fewest_steps_first():
+    numbers, target = [1, 2, 3, 4], 24
+    every = sorted(iter_solutions(numbers, target), key=simplicity_key)
+    best = best_solutions(numbers, target, k=3)
+    assert [simplicity_key(moves) for moves in best] == \
+        [simplicity_key(moves) for moves in every[:3]]
+    for moves in best:
+        assert replay(numbers, moves) == target
+
+
+def test_iter_solutions_max_steps():
+    numbers, target = [1, 2, 3, 4], 24
+    every = list(iter_solutions(numbers, target))
+    for max_steps in range(4):
+        limited = list(iter_solutions(numbers, target, max_steps=max_steps))
+        assert len(limited) == sum(len(moves) <= max_steps for moves in every)
+
+
+def test_best_solutions_unreachable():
+    assert best_solutions([5, 10], 3) == []
@@ -0,0 +1,128 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from wordindex import (IncrementalRack, LetterCountMatrix, WordIndex,
+                       sub_signatures)
+from wordstore import WordStore, compile_dictionary
+from wordtrie import WordTrie
+
+WORDS = ["cat", "act", "tac", "cast", "cats", "scat", "at", "a", "tea", "eat",
+         "eats", "seat", "teas", "east", "stead", "steady", "tasted", "dates",
+         "sated", "ate", "zzz", "Caste", "aces", "case", "ease", "tease",
+         "settee", "estate", "o'clock", "naïve"]
+RACKS = ["CATSEDYTE", "AAEESTTCS", "ZZZAT", "QQQQQQQQQ", "TEASTEADY", "A"]
+
+
+def brute_force(rack, min_length=1):
+    """Every valid dictionary word makeable from rack, the slow way."""
+    counts = Counter(rack)
+    words = {word.upper() for word in WORDS
+             if word.isascii() and word.isalpha()}
+    return sorted(word for word in words
+                  if len(word) >= min_length and not Counter(word) - counts)
+
+
+@pytest.fixture(scope="module")
+def records(tmp_path_factory):
+    return compile_dictionary(WORDS, tmp_path_factory.mktemp("dict") / "d.npy")
+
+
+@pytest.fixture(scope="module", params=["index", "records", "matrix",
+                                        "matrix_records", "trie"])
+def solver(request, records):
+    return {
+        "index": lambda: WordIndex(WORDS),
+        "records": lambda: WordIndex.from_records(records),
+        "matrix": lambda: LetterCountMatrix(WORDS),
+        "matrix_records": lambda: LetterCountMatrix.from_records(records),
+        "trie": lambda: WordTrie(WORDS),
+    }[request.param]()
+
+
+@pytest.mark.parametrize("rack", RACKS)
+@pytest.mark.parametrize("min_length", [1, 3, 5])
+def test_words_from_rack(solver, rack, min_length):
+    assert sorted(solver.words_from_rack(list(rack), min_length)) == \
+        brute_force(rack, min_length)
+
+
+@pytest.mark.parametrize("rack", RACKS)
+def test_words_of_length_and_histogram(solver, rack):
+    expected = brute_force(rack)
+    for length in range(1, len(rack) + 1):
+        assert sorted(solver.words_of_length(list(rack), length)) == \
+            [word for word in expected if len(word) == length]
+    assert solver.length_histogram(list(rack), 2) == \
+        dict(Counter(len(word) for word in expected if len(word) >= 2))
+
+
+@pytest.mark.parametrize("rack", RACKS)
+def test_longest_words(solver, rack):
+    expected = sorted(brute_force(rack, 2), key=lambda word: (-len(word), word))
+    assert solver.longest_words(list(rack), k=3, min_length=2) == expected[:3]
+
+
+@pytest.mark.parametrize("rack", RACKS)
+def test_incremental_rack(rack, records):
+    for index in (WordIndex(WORDS), WordIndex.from_records(records)):
+        incremental = IncrementalRack(index, min_length=2)
+        for letter in rack:
+            incremental.add(letter)
+        expected = brute_force(rack, 2)
+        assert sorted(incremental.words) == expected
+        assert incremental.histogram == dict(Counter(len(w) for w in expected))
+        assert incremental.best == min(expected, key=lambda w: (-len(w), w),
+                                       default=None)
+
+
+def test_sub_signatures():
+    assert sorted(sub_signatures("ABA")) == ["", "A", "AA", "AAB", "AB", "B"]
+    assert sorted(sub_signatures("ABA", size=2)) == ["AA", "AB"]
+
+
+def test_record_signatures(records):
+    signatures = WordIndex.from_records(records).signatures
+    assert sorted(signatures["ACT"]) == ["ACT", "CAT", "TAC"]
+    assert "AET" in signatures and "ABC" not in signatures
+    assert signatures.get("", "none") == "none"
+    assert signatures.get("A" * 40) is None
+    with pytest.raises(KeyError):
+        signatures["QQ"]
+
+
+def test_trie_shares_suffixes():
+    # BATS and CATS differ only in their first letter, so everything after
+    # it is shared: 5 nodes instead of the plain trie's 9.
+    trie = WordTrie(["cats", "bats"])
+    assert trie.n_nodes == 5
+    # DOGS and CATS only share the final S and the word end.
+    assert WordTrie(["cats", "dogs"]).n_nodes == 7
+    assert sorted(trie.words_from_rack(list("BCATS"))) == ["BATS", "CATS"]
+
+
+def test_store_membership_matches_frozenset(records):
+    words_store = WordStore(WORDS)
+    records_store = WordStore(records=records)
+    probes = WORDS + [word.lower() for word in WORDS] + [
+        "", "dog", "CA", "CATSS", "A" * 40, "naïve", "o'clock", "STEADIES"]
+    for word in probes:
+        assert (word in records_store) == (word in words_store), word
+        assert (word in records_store) == (word.upper() in words_store.words)
+    # Membership never decodes the whole dictionary.
+    assert records_store._words is None
+    assert len(records_store) == len(words_store)
+
+
+def test_store_by_length(records):
+    words_store = WordStore(WORDS)
+    records_store = WordStore(records=records)
+    for length in range(0, 9):
+        assert records_store.by_length(length) == words_store.by_length(length)
+    assert records_store.by_length(99) == []
+
+
+def test_records_sorted(records):
+    lengths = np.asarray(records["length"])
+    assert (np.diff(lengths) >= 0).all()
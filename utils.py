@@ -1,16 +1,90 @@
+import itertools
 import random
 
-def validate_word(word, dictionary):
+from wordstore import get_word_store
+
+def validate_word(word, dictionary=None):
     """
     Validate if the word exists in the provided dictionary.
+    Without a dictionary, the shared NLTK word store is used.
     """
+    if dictionary is None:
+        dictionary = get_word_store()
     return word.upper() in dictionary
 
-def scramble_word(word):
+def longest_shared_run(word, scrambled):
+    """
+    Return the length of the longest substring the two strings share.
+    """
+    word, scrambled = word.upper(), scrambled.upper()
+    longest = 0
+    previous = [0] * (len(scrambled) + 1)
+    for a in word:
+        current = [0] * (len(scrambled) + 1)
+        for j, b in enumerate(scrambled, start=1):
+            if a == b:
+                current[j] = previous[j - 1] + 1
+                longest = max(longest, current[j])
+        previous = current
+    return longest
+
+def scramble_word(word, max_shared_run=2, dictionary=None, max_tries=200):
     """
     Return a scrambled version of the input word.
+
+    Each attempt is a random cyclic permutation (Sattolo's algorithm), so no
+    letter stays in its place. Attempts that spell a dictionary word, or that
+    keep a run of more than max_shared_run letters from the word, are
+    rejected. After max_tries the non-word attempt sharing the shortest run
+    is used. If every attempt spelled a word, the arrangements of the letters
+    are searched in order for one that does not, so the result is never a
+    word. A word whose letters are all the same cannot be scrambled and is
+    returned as is.
+
+    Args:
+        word (str): Word to scramble
+        max_shared_run (int): Longest substring of word the scramble may keep
+        dictionary (set): Words the scramble must not be; defaults to the
+            shared NLTK word store
+        max_tries (int): Attempts before settling for the best so far
+
+    Raises:
+        ValueError: If every arrangement of the letters is a dictionary word.
+    """
+    if len(set(word.upper())) < 2:
+        return word
+    if dictionary is None:
+        dictionary = get_word_store()
+
+    def is_word(scrambled):
+        return scrambled.upper() == word.upper() or scrambled.upper() in dictionary
+
+    best, best_run = None, len(word) + 1
+    for _ in range(max_tries):
+        order = list(range(len(word)))
+        for i in range(len(order) - 1, 0, -1):
+            j = random.randrange(i)
+            order[i], order[j] = order[j], order[i]
+        scrambled = ''.join(word[k] for k in order)
+        if is_word(scrambled):
+            continue
+        run = longest_shared_run(word, scrambled)
+        if run <= max_shared_run:
+            return scrambled
+        if run < best_run:
+            best, best_run = scrambled, run
+    if best is not None:
+        return best
+
+    for letters in itertools.permutations(word):
+        scrambled = ''.join(letters)
+        if not is_word(scrambled):
+            return scrambled
+    raise ValueError(f"Every arrangement of {word} is a word.")
+
+def scramble_words(words, **kwargs):
+    """
+    Scramble a batch of words, e.g. to pre-build a day's conundrums.
+    Keyword arguments are passed on to scramble_word.
     """
-    word_list = list(word)
-    while list(word) == word_list:
-        random.shuffle(word_list)
-    return ''.join(word_list)
+    return [scramble_word(word, **kwargs) for word in words]
@@ -0,0 +1,329 @@
+"""Letter-multiset indexes over a word list for the letters game.
+
+Every word is filed under its sorted-letter signature ("TEA", "EAT" and "ATE"
+all live under "AET"). Finding every word that can be made from a rack then
+means looking up each distinct sub-multiset of the rack - at most 2^9 = 512
+lookups for a nine-letter rack - instead of scanning the whole dictionary.
+
+A WordIndex can also be built from the compiled dictionary (see wordstore),
+looking signatures up by binary search over the stored letter counts rather
+than building a dict of every word in each process.
+
+LetterCountMatrix instead holds the dictionary as an (n_words x 26) matrix of
+letter counts, so one rack - or a whole batch of racks - is checked against
+every word with NumPy comparisons. It suits bulk simulation of many rounds.
+
+IncrementalRack solves a rack while it is being picked: each new letter only
+probes the sub-multisets that contain it, so the answers are ready as soon as
+the last letter lands.
+"""
+
+from bisect import bisect_right
+from collections import Counter
+
+import numpy as np
+
+from instrumentation import count
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def letter_signature(word):
+    """Return the sorted-letter signature shared by all anagrams of word."""
+    return "".join(sorted(word.upper()))
+
+
+def sub_signatures(letters, size=None):
+    """Return the signature of every distinct sub-multiset of letters.
+
+    Args:
+        letters (list, str): The rack, e.g. ['A', 'B', 'A'] or "ABA"
+        size (int): Only return sub-multisets of exactly this many letters
+
+    Returns:
+        list: Sorted-letter signatures, including the empty string.
+    """
+    counts = Counter(letter.upper() for letter in letters)
+    signatures = [""]
+    # Letters are added in alphabetical order, so every string stays sorted.
+    for letter in sorted(counts):
+        runs = [letter * n for n in range(counts[letter] + 1)]
+        signatures = [signature + run for signature in signatures for run in runs]
+    if size is not None:
+        signatures = [signature for signature in signatures if len(signature) == size]
+    return signatures
+
+
+def letter_counts(letters):
+    """Return the 26-slot uint8 count vector (A-Z) for letters."""
+    counts = np.zeros(len(ALPHABET), dtype=np.uint8)
+    for letter in letters:
+        counts[ord(letter.upper()) - ord("A")] += 1
+    return counts
+
+
+def count_matrix(words):
+    """Return the (len(words) x 26) uint8 letter-count matrix for A-Z words."""
+    lengths = np.array([len(word) for word in words], dtype=np.int64)
+    # Scatter every letter of every word into its row in one pass.
+    codes = np.frombuffer("".join(words).encode("ascii"),
+                            dtype=np.uint8) - ord("A")
+    rows = np.repeat(np.arange(len(words)), lengths)
+    counts = np.zeros((len(words), len(ALPHABET)), dtype=np.uint8)
+    np.add.at(counts, (rows, codes), 1)
+    return counts
+
+
+class WordIndex:
+    def __init__(self, words):
+        """Anagram index keyed by sorted-letter signature.
+
+        Args:
+            words (iterable): Dictionary words, any case. Duplicates and
+                words with characters outside A-Z are dropped.
+        """
+        signatures = {}
+        for word in set(word.upper() for word in words):
+            if not (word.isascii() and word.isalpha()):
+                continue
+            signatures.setdefault(letter_signature(word), []).append(word)
+        self.signatures = signatures
+        self.n_words = sum(len(group) for group in signatures.values())
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from a compiled dictionary without a dict of every word.
+
+        Signatures are looked up by binary search over the records' letter
+        counts, and only the words found are decoded.
+
+        Args:
+            records (np.ndarray): Records from wordstore.compile_dictionary
+        """
+        index = cls.__new__(cls)
+        index.signatures = RecordSignatures(records)
+        index.n_words = len(records)
+        return index
+
+    def anagrams(self, word):
+        """Return all dictionary words using exactly the letters of word."""
+        return list(self.signatures.get(letter_signature(word), ()))
+
+    def words_from_rack(self, letters, min_length=1):
+        """Return every word that can be made from the rack.
+
+        Args:
+            letters (list): Letters available, each usable once
+            min_length (int): Shortest word length to include
+
+        Returns:
+            list: Matching words, in no particular order.
+        """
+        possible_words = []
+        signatures = sub_signatures(letters)
+        for signature in signatures:
+            if len(signature) < min_length:
+                continue
+            possible_words.extend(self.signatures.get(signature, ()))
+        count("letters.words_scanned", len(signatures), solver="index")
+        return possible_words
+
+    def words_of_length(self, letters, length):
+        """Return the words of exactly length letters makeable from the rack."""
+        possible_words = []
+        for signature in sub_signatures(letters, size=length):
+            possible_words.extend(self.signatures.get(signature, ()))
+        return possible_words
+
+    def length_histogram(self, letters, min_length=1):
+        """Return {length: number of makeable words} without listing them."""
+        histogram = {}
+        for signature in sub_signatures(letters):
+            n_words = len(self.signatures.get(signature, ()))
+            if n_words and len(signature) >= min_length:
+                histogram[len(signature)] = histogram.get(len(signature), 0) + n_words
+        return histogram
+
+    def longest_words(self, letters, k=3, min_length=1):
+        """Return up to k of the longest words, longest first.
+
+        Lengths are probed from the rack size downwards and the search stops
+        at the first length that brings the total to k.
+        """
+        found = []
+        for length in range(len(letters), min_length - 1, -1):
+            found.extend(sorted(self.words_of_length(letters, length)))
+            if len(found) >= k:
+                break
+        return found[:k]
+
+
+class RecordSignatures:
+    def __init__(self, records):
+        """Read-only {signature: words} lookup over compiled dictionary records.
+
+        Each record's signature is spelled out from its stored letter counts
+        and the signatures are sorted once, so a lookup is a binary search.
+
+        Args:
+            records (np.ndarray): Records from wordstore.compile_dictionary
+        """
+        counts = np.asarray(records['counts'])
+        lengths = counts.sum(axis=1, dtype=np.int64)
+        width = max(int(lengths.max(initial=0)), 1)
+        # Letter codes of every signature, in record order, A to Z.
+        codes = np.repeat(np.tile(np.frombuffer(ALPHABET.encode("ascii"), dtype=np.uint8),
+                                  len(counts)), counts.ravel())
+        rows = np.repeat(np.arange(len(counts)), lengths)
+        columns = np.arange(len(codes)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        chars = np.zeros((len(counts), width), dtype=np.uint8)
+        chars[rows, columns] = codes
+        keys = chars.view(f"S{width}").ravel()
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        self.width = width
+        self.words = records['word']
+
+    def get(self, signature, default=None):
+        """Return the words filed under signature, or default."""
+        if len(signature) > self.width:
+            return default
+        key = signature.encode("ascii")
+        start = np.searchsorted(self.keys, key, side="left")
+        # Most sub-racks spell no word, so only search for the end on a hit.
+        if start == len(self.keys) or self.keys[start] != key:
+            return default
+        stop = np.searchsorted(self.keys, key, side="right")
+        return np.char.decode(self.words[self.order[start:stop]], "ascii").tolist()
+
+    def __getitem__(self, signature):
+        words = self.get(signature)
+        if words is None:
+            raise KeyError(signature)
+        return words
+
+    def __contains__(self, signature):
+        return self.get(signature) is not None
+
+
+class IncrementalRack:
+    def __init__(self, index, min_length=1):
+        """A rack's valid words, kept up to date as letters are added.
+
+        The sub-multisets of rack + L are those of the rack plus each of
+        them with L added, so add() only looks up the new ones.
+
+        Args:
+            index (WordIndex): Dictionary to look words up in
+            min_length (int): Shortest word length to include
+        """
+        self.index = index
+        self.min_length = min_length
+        self.letters = []
+        self.signatures = {""}
+        self.words = []
+        self.histogram = {}
+        self.best = None
+
+    def add(self, letter):
+        """Add one letter to the rack and return the words it makes possible."""
+        letter = letter.upper()
+        self.letters.append(letter)
+        new_signatures = set()
+        for signature in self.signatures:
+            i = bisect_right(signature, letter)
+            new_signatures.add(signature[:i] + letter + signature[i:])
+        new_signatures -= self.signatures
+        self.signatures |= new_signatures
+
+        new_words = []
+        for signature in new_signatures:
+            if len(signature) >= self.min_length:
+                new_words.extend(self.index.signatures.get(signature, ()))
+        for word in new_words:
+            self.histogram[len(word)] = self.histogram.get(len(word), 0) + 1
+            if self.best is None or (-len(word), word) < (-len(self.best), self.best):
+                self.best = word
+        self.words.extend(new_words)
+        count("letters.words_scanned", len(new_signatures), solver="incremental")
+        return new_words
+
+
+class LetterCountMatrix:
+    def __init__(self, words):
+        """Dense letter-count matrix over a dictionary.
+
+        Args:
+            words (iterable): Dictionary words, any case. Duplicates and
+                words with characters outside A-Z are dropped.
+        """
+        words = sorted(word for word in set(word.upper() for word in words)
+                        if word.isascii() and word.isalpha())
+        self.words = np.array(words, dtype=object)
+        self.lengths = np.array([len(word) for word in words], dtype=np.int64)
+        self.counts = count_matrix(words)
+        self.n_words = len(words)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from a compiled dictionary without recounting letters.
+
+        Args:
+            records (np.ndarray): Records from wordstore.compile_dictionary;
+                the counts stay memory-mapped if records are.
+        """
+        matrix = cls.__new__(cls)
+        matrix.words = np.char.decode(records['word'], 'ascii')
+        matrix.lengths = records['length'].astype(np.int64)
+        matrix.counts = records['counts']
+        matrix.n_words = len(records)
+        return matrix
+
+    def valid_mask(self, letters, min_length=1):
+        """Return a boolean mask over self.words for a single rack."""
+        rack_counts = letter_counts(letters)
+        mask = np.all(self.counts <= rack_counts, axis=1)
+        mask &= self.lengths >= min_length
+        return mask
+
+    def valid_masks(self, racks, min_length=1):
+        """Return an (n_racks x n_words) boolean mask for a batch of racks.
+
+        The comparison is accumulated one letter column at a time so the
+        working memory stays at one mask rather than n_racks x n_words x 26.
+
+        Args:
+            racks (list): Racks, each a list of letters
+            min_length (int): Shortest word length to allow
+        """
+        rack_counts = np.array([letter_counts(letters) for letters in racks],
+                                dtype=np.uint8).reshape(-1, len(ALPHABET))
+        masks = np.broadcast_to(self.lengths >= min_length,
+                                (len(rack_counts), self.n_words)).copy()
+        for column in range(len(ALPHABET)):
+            masks &= (self.counts[:, column][np.newaxis, :]
+                        <= rack_counts[:, column][:, np.newaxis])
+        return masks
+
+    def words_from_rack(self, letters, min_length=1):
+        """Return every word that can be made from the rack."""
+        count("letters.words_scanned", self.n_words, solver="matrix")
+        return self.words[self.valid_mask(letters, min_length)].tolist()
+
+    def words_of_length(self, letters, length):
+        """Return the words of exactly length letters makeable from the rack."""
+        mask = self.valid_mask(letters, length) & (self.lengths == length)
+        return self.words[mask].tolist()
+
+    def length_histogram(self, letters, min_length=1):
+        """Return {length: number of makeable words} without listing them."""
+        counts = np.bincount(self.lengths[self.valid_mask(letters, min_length)])
+        return {length: int(n) for length, n in enumerate(counts) if n}
+
+    def longest_words(self, letters, k=3, min_length=1):
+        """Return up to k of the longest words, longest first."""
+        mask = self.valid_mask(letters, min_length)
+        words, lengths = self.words[mask], self.lengths[mask]
+        # Longest first, then alphabetical, matching the other solvers.
+        order = np.lexsort((words.astype(str), -lengths))[:k]
+        return words[order].tolist()
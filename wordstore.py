@@ -0,0 +1,216 @@
+"""Process-wide dictionary shared by the word games.
+
+The NLTK words corpus is read once, on first use, and shared by LettersGame,
+ConundrumGame and utils.validate_word. Length buckets and word solvers are
+built lazily on top of it, so a full game pays the corpus cost once rather
+than once per round.
+
+The corpus can also be compiled into resources/dictionary.npy, a fixed-stride
+record per word (sorted by length, then alphabetically) with its letter-count
+signature precomputed. When that file exists it is opened memory-mapped
+instead of parsing NLTK, so worker processes share the page-cached data.
+Build it with:
+
+    python wordstore.py
+"""
+
+import itertools
+import os
+import threading
+
+import nltk
+import numpy as np
+
+from instrumentation import timer
+from wordindex import ALPHABET, count_matrix
+
+_store = None
+_store_lock = threading.Lock()
+_installed_corpora = set()
+# Never-reused ids for WordStores, for keying caches on a store.
+_store_ids = itertools.count()
+
+DEFAULT_DICTIONARY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources", "dictionary.npy")
+
+# NLTK resource paths for the corpora the games use.
+NLTK_RESOURCES = {
+    'words': 'corpora/words',
+    'wordnet': 'corpora/wordnet',
+}
+
+
+def ensure_nltk_corpus(name):
+    """Download an NLTK corpus unless it is already installed."""
+    if name in _installed_corpora:
+        return
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+    except LookupError:
+        nltk.download(name)
+    _installed_corpora.add(name)
+
+
+def load_nltk_words():
+    """Return the raw NLTK words corpus, downloading it if needed."""
+    ensure_nltk_corpus('words')
+    return nltk.corpus.words.words()
+
+
+def compile_dictionary(words=None, path=DEFAULT_DICTIONARY_PATH):
+    """Compile a word list into the binary dictionary artifact.
+
+    Args:
+        words (iterable): Words to compile; defaults to the NLTK corpus
+        path (str): Output .npy file
+
+    Returns:
+        np.ndarray: The records written.
+    """
+    if words is None:
+        words = load_nltk_words()
+    words = sorted(set(word.upper() for word in words
+                       if word.isascii() and word.isalpha()),
+                   key=lambda word: (len(word), word))
+    max_length = max(len(word) for word in words)
+    dtype = np.dtype([('word', f'S{max_length}'), ('length', 'u1'),
+                      ('counts', 'u1', (len(ALPHABET),))])
+    records = np.empty(len(words), dtype=dtype)
+    records['word'] = [word.encode('ascii') for word in words]
+    records['length'] = [len(word) for word in words]
+    records['counts'] = count_matrix(words)
+    np.save(path, records)
+    return records
+
+
+def load_compiled_dictionary(path=DEFAULT_DICTIONARY_PATH):
+    """Open a compiled dictionary memory-mapped, read-only."""
+    return np.load(path, mmap_mode='r')
+
+
+class WordStore:
+    def __init__(self, words=None, records=None):
+        """Upper-cased dictionary with lazily built lookups.
+
+        Args:
+            words (iterable): Dictionary words, any case. Words with
+                characters outside A-Z are dropped.
+            records (np.ndarray): A compiled dictionary to use instead of
+                words; membership is a binary search over it, and length
+                buckets are decoded from it only when needed.
+        """
+        if (words is None) == (records is None):
+            raise ValueError("Give exactly one of words or records.")
+        self.store_id = next(_store_ids)
+        self.records = records
+        self._words = None
+        if words is not None:
+            self._words = frozenset(word.upper() for word in words
+                                    if word.isascii() and word.isalpha())
+        self._length_buckets = None
+        self._length_bounds = None
+        self._solvers = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_compiled(cls, path=DEFAULT_DICTIONARY_PATH):
+        """Return a store backed by a memory-mapped compiled dictionary."""
+        return cls(records=load_compiled_dictionary(path))
+
+    @property
+    def words(self):
+        """Frozenset of every upper-case word."""
+        if self._words is None:
+            self._words = frozenset(
+                np.char.decode(self.records['word'], 'ascii').tolist())
+        return self._words
+
+    def __contains__(self, word):
+        word = word.upper()
+        if self._words is not None:
+            return word in self._words
+        if not (word.isascii() and word.isalpha()):
+            return False
+        # Binary search within the word's length slice of the sorted records.
+        key = word.encode('ascii')
+        start, stop = self._length_slice(len(word))
+        words = self.records['word'][start:stop]
+        i = np.searchsorted(words, key)
+        return bool(i < len(words) and words[i] == key)
+
+    def __len__(self):
+        if self._words is None:
+            return len(self.records)
+        return len(self._words)
+
+    @property
+    def length_buckets(self):
+        """Dict of word length -> sorted list of words of that length."""
+        if self._length_buckets is None:
+            buckets = {}
+            for word in sorted(self.words):
+                buckets.setdefault(len(word), []).append(word)
+            self._length_buckets = buckets
+        return self._length_buckets
+
+    def _length_slice(self, length):
+        """Return (start, stop) of the records with exactly length letters."""
+        if self._length_bounds is None:
+            # Records are sorted by length, so each bucket is one slice.
+            lengths = np.asarray(self.records['length'])
+            self._length_bounds = np.searchsorted(
+                lengths, np.arange(lengths.max(initial=0) + 2))
+        if length + 1 >= len(self._length_bounds):
+            return 0, 0
+        return self._length_bounds[length], self._length_bounds[length + 1]
+
+    def by_length(self, length):
+        """Return the sorted list of words with exactly length letters."""
+        if self.records is not None and self._length_buckets is None:
+            start, stop = self._length_slice(length)
+            return np.char.decode(self.records['word'][start:stop],
+                                  'ascii').tolist()
+        return self.length_buckets.get(length, [])
+
+    def get_solver(self, solver_class):
+        """Return this store's instance of a word solver, building it once.
+
+        Args:
+            solver_class (type): E.g. WordIndex or LetterCountMatrix; called
+                with the store's words
+        """
+        if solver_class not in self._solvers:
+            with self._lock:
+                if solver_class not in self._solvers:
+                    with timer("wordstore.build_solver",
+                               solver=solver_class.__name__):
+                        if (self.records is not None
+                                and hasattr(solver_class, "from_records")):
+                            solver = solver_class.from_records(self.records)
+                        else:
+                            solver = solver_class(self.words)
+                    self._solvers[solver_class] = solver
+        return self._solvers[solver_class]
+
+
+def get_word_store():
+    """Return the shared store over the NLTK words corpus, loading it once.
+
+    The compiled dictionary is used when it has been built.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if os.path.exists(DEFAULT_DICTIONARY_PATH):
+                    with timer("wordstore.load", source="compiled"):
+                        _store = WordStore.from_compiled(DEFAULT_DICTIONARY_PATH)
+                else:
+                    with timer("wordstore.load", source="nltk"):
+                        _store = WordStore(load_nltk_words())
+    return _store
+
+
+if __name__ == "__main__":
+    records = compile_dictionary()
+    print(f"Compiled {len(records)} words to {DEFAULT_DICTIONARY_PATH}")
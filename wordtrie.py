@@ -0,0 +1,147 @@
+"""DAWG-backed letters solver.
+
+The dictionary is stored as a directed acyclic word graph: a trie whose
+identical suffix subtrees are shared. A rack is solved by walking the graph
+depth-first while consuming letters from the rack's counts, so only prefixes
+that some dictionary word continues are ever explored.
+
+Each node also records the longest suffix below it, which lets a search for
+words of an exact length skip branches too short to reach it. The
+longest-first queries use this to stop as soon as enough long words are
+found.
+"""
+
+from collections import Counter
+
+from instrumentation import count
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "max_suffix")
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = False
+        # Length of the longest word suffix starting below this node.
+        self.max_suffix = 0
+
+    def key(self):
+        """Identity of the subtree, assuming children are already shared."""
+        return (self.terminal,
+                tuple((letter, id(child))
+                      for letter, child in sorted(self.children.items())))
+
+
+class WordTrie:
+    def __init__(self, words):
+        """Build the word graph incrementally from sorted words.
+
+        Suffixes are shared as soon as they can no longer change (Daciuk's
+        algorithm), so the full uncompressed trie never exists in memory.
+
+        Args:
+            words (iterable): Dictionary words, any case. Duplicates and
+                words with characters outside A-Z are dropped.
+        """
+        words = sorted(set(word.upper() for word in words
+                           if word.isascii() and word.isalpha()))
+        self.root = _Node()
+        self.n_words = len(words)
+        self._register = {}
+        # (parent, letter, child) edges on the path of the previous word
+        # whose child has not yet been checked against the register.
+        self._unchecked = []
+
+        previous = ""
+        for word in words:
+            common = 0
+            for a, b in zip(word, previous):
+                if a != b:
+                    break
+                common += 1
+            self._minimize(common)
+            node = self._unchecked[-1][2] if self._unchecked else self.root
+            for letter in word[common:]:
+                child = _Node()
+                node.children[letter] = child
+                self._unchecked.append((node, letter, child))
+                node = child
+            node.terminal = True
+            previous = word
+        self._minimize(0)
+        self.root.max_suffix = max(
+            (child.max_suffix + 1 for child in self.root.children.values()),
+            default=0)
+        self.n_nodes = len(self._register) + 1
+        del self._register, self._unchecked
+
+    def _minimize(self, down_to):
+        while len(self._unchecked) > down_to:
+            parent, letter, child = self._unchecked.pop()
+            child.max_suffix = max(
+                (grandchild.max_suffix + 1
+                 for grandchild in child.children.values()), default=0)
+            key = child.key()
+            if key in self._register:
+                parent.children[letter] = self._register[key]
+            else:
+                self._register[key] = child
+
+    def _walk(self, node, counts, prefix, found, min_length, exact_length):
+        """Collect words below node into found; return the nodes visited."""
+        visited = 1
+        for letter in counts:
+            if counts[letter] == 0:
+                continue
+            child = node.children.get(letter)
+            if child is None:
+                continue
+            depth = len(prefix) + 1
+            if exact_length is not None and depth + child.max_suffix < exact_length:
+                continue
+            prefix.append(letter)
+            if child.terminal and depth >= min_length and (
+                    exact_length is None or depth == exact_length):
+                found.append("".join(prefix))
+            if child.children and (exact_length is None or depth < exact_length):
+                counts[letter] -= 1
+                visited += self._walk(child, counts, prefix, found,
+                                      min_length, exact_length)
+                counts[letter] += 1
+            prefix.pop()
+        return visited
+
+    def words_from_rack(self, letters, min_length=1):
+        """Return every word that can be made from the rack."""
+        found = []
+        counts = Counter(letter.upper() for letter in letters)
+        visited = self._walk(self.root, counts, [], found, min_length, None)
+        count("letters.words_scanned", visited, solver="trie")
+        return found
+
+    def words_of_length(self, letters, length):
+        """Return the words of exactly length letters makeable from the rack."""
+        found = []
+        counts = Counter(letter.upper() for letter in letters)
+        self._walk(self.root, counts, [], found, length, length)
+        return found
+
+    def length_histogram(self, letters, min_length=1):
+        """Return {length: number of makeable words}."""
+        histogram = {}
+        for word in self.words_from_rack(letters, min_length):
+            histogram[len(word)] = histogram.get(len(word), 0) + 1
+        return histogram
+
+    def longest_words(self, letters, k=3, min_length=1):
+        """Return up to k of the longest words, longest first.
+
+        Lengths are probed from the rack size downwards and the search stops
+        at the first length that brings the total to k.
+        """
+        found = []
+        for length in range(len(letters), min_length - 1, -1):
+            found.extend(sorted(self.words_of_length(letters, length)))
+            if len(found) >= k:
+                break
+        return found[:k]